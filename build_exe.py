@@ -14,13 +14,23 @@ import os
 import sys
 import subprocess
 import shutil
+import struct
+import gzip
+import hashlib
+import importlib.util
+import importlib.metadata
+import argparse
+import ast
+import pkgutil
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
 
-# 设置 UTF-8 编码输出
-if sys.platform == 'win32':
-    import io
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+# 设置 UTF-8 编码输出（原地切换编码，子进程也使用UTF-8模式）
+if sys.platform == 'win32' and sys.stdout.encoding.lower() != 'utf-8':
+    os.environ.setdefault('PYTHONUTF8', '1')
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+    sys.stderr.reconfigure(encoding='utf-8', errors='replace')
 
 # 从统一版本配置文件导入版本信息
 try:
@@ -39,13 +49,227 @@ except ImportError:
     APP_DISPLAY_NAME = "Chango Editor"
     APP_DESCRIPTION = "功能强大的代码编辑器"
 
-def clean_build_dirs():
-    """清理构建目录"""
-    dirs_to_clean = ['build', 'dist', '__pycache__']
-    for dir_name in dirs_to_clean:
+# 项目根目录（脚本所在目录），构建中的相对路径都以此为基准
+ROOT = str(Path(__file__).resolve().parent)
+
+# 打包模式：默认 onedir（启动时无需解压到临时目录），
+# 设置环境变量 PYINSTALLER_BUILD_ONEFILE=yes 可切回单文件模式
+ONEFILE = os.environ.get('PYINSTALLER_BUILD_ONEFILE') == 'yes'
+
+# 文件大小换算单位
+MB = 1 << 20
+
+@dataclass
+class BuildConfig:
+    """构建配置"""
+    onefile: bool = ONEFILE  # 单文件模式（默认目录模式）
+    verify: bool = True      # 构建前验证依赖
+    optimize: int = 2        # 字节码优化级别（0-2）
+    upx: bool = False        # 使用UPX压缩
+    full_rebuild: bool = False  # 忽略 build 缓存完全重新构建
+    backend: str = 'pyinstaller'  # 打包后端（pyinstaller 或 nuitka）
+    zip: bool = False        # 目录模式下额外生成分发用的zip（发布时使用）
+
+# 图标文件路径
+ICON_SVG_PATH = 'resources/icons/chango_editor.svg'
+ICON_ICO_PATH = 'resources/icons/chango_editor.ico'
+ICON_PNG_PATH = 'resources/icons/chango_editor.png'
+
+# 记录上次成功构建时源码哈希的文件（位于 PyInstaller 工作目录中）
+SOURCE_HASH_PATH = 'build/.srchash'
+
+# 压缩后的主题文件输出目录（打包时替代原始 JSON）
+COMPRESSED_THEME_DIR = 'build/themes'
+
+# 记录上次转换时SVG内容哈希的缓存文件
+ICON_HASH_PATH = 'resources/icons/.svg.hash'
+
+# 编辑器中定义语言映射的源文件及变量名（用于分析需要打包的词法分析器）
+LANGUAGE_MAP_SOURCES = [
+    ('src/core/editor.py', 'LANGUAGE_MAP'),
+    ('src/core/editor.py', 'FILENAME_LANGUAGE_MAP'),
+]
+LANGUAGE_ALIAS_SOURCE = ('src/utils/syntax.py', 'language_aliases')
+
+# 可选第三方依赖（按顶层包名）及其需要显式声明的模块
+OPTIONAL_HIDDEN_IMPORTS = {
+    'watchdog': ['watchdog', 'watchdog.observers', 'watchdog.events'],  # 文件监控
+    'git': ['git', 'gitdb', 'smmap'],                              # Git 支持
+}
+
+# 仅用于图标转换的依赖，图标已是最新时无需检查
+ICON_DEPENDENCIES = {'Pillow', 'CairoSVG'}
+
+# PyQt6 中编辑器用不到、但会被 PyInstaller 钩子整体收集的 Qt 动态库
+QT_EXCLUDED_BINARIES = [
+    'Qt6Designer.dll',
+    'Qt6Network.dll',
+    'Qt6OpenGL.dll',
+    'Qt6Pdf.dll',
+    'Qt6Qml.dll',
+    'Qt6QmlModels.dll',
+    'Qt6Quick.dll',
+    'Qt6QuickWidgets.dll',
+]
+
+# 依赖上述动态库的插件及 QML/翻译数据（按打包后的路径前缀匹配）
+QT_EXCLUDED_PREFIXES = [
+    'PyQt6/Qt6/plugins/imageformats/qpdf',
+    'PyQt6/Qt6/plugins/qmltooling',
+    'PyQt6/Qt6/plugins/tls',
+    'PyQt6/Qt6/qml',
+    'PyQt6/Qt6/translations',
+]
+
+# 插入到 spec 文件 Analysis 之后的过滤代码
+QT_FILTER_BLOCK = '''
+# 过滤编辑器用不到的 Qt 动态库、插件和数据（由 build_exe.py 生成）
+QT_EXCLUDED_BINARIES = set({binaries!r})
+QT_EXCLUDED_PREFIXES = {prefixes!r}
+
+def _keep_qt_entry(entry):
+    dest = entry[0].replace('\\\\', '/')
+    return (dest.rsplit('/', 1)[-1] not in QT_EXCLUDED_BINARIES
+            and not dest.startswith(QT_EXCLUDED_PREFIXES))
+
+a.binaries = [entry for entry in a.binaries if _keep_qt_entry(entry)]
+a.datas = [entry for entry in a.datas if _keep_qt_entry(entry)]
+
+'''
+
+def _svg_hash(svg_data=None):
+    """计算SVG图标内容的哈希值"""
+    if svg_data is None:
+        with open(ICON_SVG_PATH, 'rb') as f:
+            svg_data = f.read()
+    return hashlib.blake2b(svg_data, digest_size=16).hexdigest()
+
+def icons_up_to_date():
+    """检查ICO/PNG图标是否存在且与当前SVG一致"""
+    if not (os.path.exists(ICON_ICO_PATH) and os.path.exists(ICON_PNG_PATH)):
+        return False
+    if not os.path.exists(ICON_SVG_PATH):
+        return True
+    
+    # 优先比较上次转换记录的SVG哈希
+    try:
+        with open(ICON_HASH_PATH, 'r', encoding='utf-8') as f:
+            return f.read().strip() == _svg_hash()
+    except OSError:
+        pass
+    
+    # 没有哈希记录时按修改时间判断
+    svg_mtime = os.path.getmtime(ICON_SVG_PATH)
+    return (os.path.getmtime(ICON_ICO_PATH) >= svg_mtime and
+            os.path.getmtime(ICON_PNG_PATH) >= svg_mtime)
+
+def pyinstaller_supports_optimize():
+    """PyInstaller 6.6 起支持 --optimize 参数"""
+    try:
+        major, minor = importlib.metadata.version('pyinstaller').split('.')[:2]
+        return (int(major), int(minor)) >= (6, 6)
+    except (importlib.metadata.PackageNotFoundError, ValueError):
+        return False
+
+def source_hash():
+    """根据 src 下所有 .py 文件的路径、修改时间和大小计算哈希"""
+    digest = hashlib.blake2b(digest_size=16)
+    for path in sorted(Path('src').rglob('*.py')):
+        stat = path.stat()
+        digest.update(f"{path}|{stat.st_mtime_ns}|{stat.st_size}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+def sources_unchanged(src_hash):
+    """源码自上次成功构建以来是否未变化（可复用 build 缓存）"""
+    try:
+        with open(SOURCE_HASH_PATH, 'r', encoding='utf-8') as f:
+            return f.read().strip() == src_hash
+    except OSError:
+        return False
+
+def set_reproducible_env():
+    """为打包子进程设置可复现构建所需的环境变量
+
+    固定哈希种子，并以最近一次提交时间作为 SOURCE_DATE_EPOCH，
+    使相同源码多次构建得到相同的输出。
+    """
+    os.environ['PYTHONHASHSEED'] = '0'
+    try:
+        commit_time = subprocess.run(
+            ['git', 'log', '-1', '--format=%ct'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return
+    if commit_time:
+        os.environ['SOURCE_DATE_EPOCH'] = commit_time
+
+def clean_build_dirs(keep_build=False, verbose=True):
+    """清理构建目录
+
+    Args:
+        keep_build: 保留 build 目录中 PyInstaller 的分析缓存
+        verbose: 是否输出已清理的目录（在后台线程中清理时关闭，由调用方输出）
+
+    Returns:
+        list: 已清理的目录
+    """
+    dirs_to_clean = ['dist', '__pycache__'] if keep_build else ['build', 'dist', '__pycache__']
+    existing = [d for d in dirs_to_clean if os.path.exists(d)]
+    if not existing:
+        return existing
+    
+    # 一次系统命令删除所有目录，比逐个文件 rmtree 快得多
+    if sys.platform == 'win32':
+        subprocess.run(['cmd', '/c', 'rd', '/s', '/q', *existing], check=False)
+    else:
+        subprocess.run(['rm', '-rf', *existing], check=False)
+    
+    for dir_name in existing:
+        # 系统命令未能删除时回退到 rmtree
         if os.path.exists(dir_name):
             shutil.rmtree(dir_name)
+        if verbose:
             print(f"已清理目录: {dir_name}")
+    return existing
+
+def compress_themes(theme_files, out_dir=COMPRESSED_THEME_DIR):
+    """将主题 JSON 压缩为 .json.gz，供打包使用
+
+    Args:
+        theme_files: 主题文件路径列表
+        out_dir: 压缩文件输出目录
+
+    Returns:
+        list: 压缩后的文件路径
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    compressed = []
+    for theme_file in theme_files:
+        gz_path = Path(out_dir) / f"{Path(theme_file).name}.gz"
+        # mtime=0 使相同内容得到相同的压缩结果
+        gz_path.write_bytes(gzip.compress(Path(theme_file).read_bytes(), 9, mtime=0))
+        compressed.append(gz_path)
+    return compressed
+
+def _scan_dir(dir_path):
+    """扫描目录一次，返回其中的文件名集合；目录不存在时返回 None"""
+    try:
+        with os.scandir(dir_path) as entries:
+            return {entry.name for entry in entries}
+    except OSError:
+        return None
+
+def _dir_size(dir_path):
+    """递归统计目录大小（scandir 的目录项自带文件信息，避免重复 stat）"""
+    total = 0
+    with os.scandir(dir_path) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                total += _dir_size(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                total += entry.stat(follow_symlinks=False).st_size
+    return total
 
 def verify_dependencies():
     """验证构建依赖"""
@@ -53,9 +277,9 @@ def verify_dependencies():
     
     # 检查PyInstaller
     try:
-        import PyInstaller
-        print(f"✅ PyInstaller: {PyInstaller.__version__}")
-    except ImportError:
+        # 从包元数据读取版本号，无需导入 PyInstaller
+        print(f"✅ PyInstaller: {importlib.metadata.version('pyinstaller')}")
+    except importlib.metadata.PackageNotFoundError:
         print("❌ PyInstaller 未安装")
         print("请运行: pip install pyinstaller")
         return False
@@ -66,7 +290,6 @@ def verify_dependencies():
         'Pygments': 'pygments', 
         'Pillow': 'PIL',
         'CairoSVG': 'cairosvg',
-        'chardet': 'chardet',
         'watchdog': 'watchdog'
     }
     
@@ -75,21 +298,27 @@ def verify_dependencies():
         'GitPython': 'git'
     }
     
+    # 图标已是最新时跳过图标转换依赖的检查
+    skip_icon_deps = icons_up_to_date()
+    
     for name, module in dependencies.items():
-        try:
-            __import__(module)
+        if skip_icon_deps and name in ICON_DEPENDENCIES:
+            print(f"⏭️  {name} (图标已是最新，跳过检查)")
+            continue
+        # 只查找模块而不执行导入
+        if importlib.util.find_spec(module) is not None:
             print(f"✅ {name}")
-        except ImportError:
+        else:
             print(f"❌ {name} 未安装")
             print(f"请运行: pip install {name.lower()}")
             return False
     
     # 检查可选依赖
-    for name, module in optional_dependencies.items():
+    # 按发行包名读取元数据，不导入模块本身
+    for name in optional_dependencies:
         try:
-            __import__(module)
-            print(f"✅ {name} (可选)")
-        except ImportError:
+            print(f"✅ {name} {importlib.metadata.version(name)} (可选)")
+        except importlib.metadata.PackageNotFoundError:
             print(f"⚠️  {name} 未安装 (可选，用于Git功能)")
     
     # 检查源文件
@@ -99,74 +328,133 @@ def verify_dependencies():
         'src/core/i18n.py'
     ]
     
+    # 每个目录只扫描一次，之后用集合判断文件是否存在
+    dir_entries = {}
     for file_path in required_files:
-        if os.path.exists(file_path):
+        parent, name = os.path.split(file_path)
+        if parent not in dir_entries:
+            dir_entries[parent] = _scan_dir(parent) or set()
+        if name in dir_entries[parent]:
             print(f"✅ {file_path}")
         else:
             print(f"❌ 缺少文件: {file_path}")
             return False
     
     # 检查主题文件（自动扫描）
-    theme_dir = Path('resources/themes')
-    if theme_dir.exists():
-        theme_count = len(list(theme_dir.glob('*.json')))
+    theme_entries = _scan_dir('resources/themes')
+    if theme_entries is not None:
+        theme_count = sum(1 for name in theme_entries if name.endswith('.json'))
         print(f"✅ 主题文件: {theme_count} 个")
     else:
         print("⚠️  警告: resources/themes 目录不存在")
     
     # 检查国际化语言文件（自动扫描）
-    i18n_dir = Path('resources/i18n/locales')
-    if i18n_dir.exists():
-        locale_count = len(list(i18n_dir.glob('*.json')))
+    locale_entries = _scan_dir('resources/i18n/locales')
+    if locale_entries is not None:
+        locale_count = sum(1 for name in locale_entries if name.endswith('.json'))
         print(f"✅ 语言文件: {locale_count} 个")
     else:
         print("⚠️  警告: resources/i18n/locales 目录不存在")
     
     return True
 
+def _write_ico(ico_path, png_images):
+    """直接拼装PNG格式的多尺寸ICO文件
+
+    Args:
+        ico_path: 输出ICO文件路径
+        png_images: [(尺寸, PNG字节数据), ...]
+    """
+    # ICONDIR + 每个尺寸一个 ICONDIRENTRY，之后依次写入PNG数据
+    header = struct.pack('<HHH', 0, 1, len(png_images))
+    entries = []
+    offset = len(header) + 16 * len(png_images)
+    for size, png_data in png_images:
+        dimension = 0 if size >= 256 else size  # 0 表示 256
+        entries.append(struct.pack(
+            '<BBBBHHII',
+            dimension, dimension, 0, 0, 1, 32, len(png_data), offset
+        ))
+        offset += len(png_data)
+    
+    with open(ico_path, 'wb') as f:
+        f.write(header)
+        f.write(b''.join(entries))
+        for _, png_data in png_images:
+            f.write(png_data)
+
 def convert_svg_to_ico():
     """将SVG图标转换为ICO和PNG格式"""
+    # 图标已是最新时无需导入 Pillow/cairosvg
+    if icons_up_to_date():
+        print("图标已是最新，跳过转换")
+        return True
+    
     try:
         from PIL import Image
-        import cairosvg
+        from cairosvg.parser import Tree
+        from cairosvg.surface import PNGSurface
         import io
         
-        svg_path = 'resources/icons/chango_editor.svg'
-        ico_path = 'resources/icons/chango_editor.ico'
-        png_path = 'resources/icons/chango_editor.png'
+        svg_path = ICON_SVG_PATH
+        ico_path = ICON_ICO_PATH
+        png_path = ICON_PNG_PATH
         
         if os.path.exists(svg_path):
             print(f"开始转换SVG图标: {svg_path}")
             
             # 转换SVG到PNG (多种尺寸)
             sizes = [256, 128, 64, 48, 32, 16]
-            images = []
+            # 只栅格化256px主图和32px小图（小尺寸单独渲染更清晰），
+            # 其余尺寸由Pillow从不小于目标尺寸的渲染图缩放得到
+            render_sizes = [256, 32]
             
-            for size in sizes:
-                png_data = cairosvg.svg2png(
-                    url=svg_path, 
+            # 只读取和解析一次SVG，各尺寸复用同一棵树
+            with open(svg_path, 'rb') as f:
+                svg_data = f.read()
+            # 传入url以便解析SVG中的相对引用
+            tree = Tree(bytestring=svg_data, url=svg_path)
+            
+            def _render(size):
+                buffer = io.BytesIO()
+                PNGSurface(
+                    tree, buffer, 96,
                     output_width=size, 
                     output_height=size
-                )
-                img = Image.open(io.BytesIO(png_data))
-                # 确保是RGBA模式，支持透明度
-                if img.mode != 'RGBA':
-                    img = img.convert('RGBA')
-                images.append(img)
+                ).finish()
+                return size, buffer.getvalue()
+            
+            # 逐个渲染：cairosvg 的 Tree/Surface 不保证线程安全，且渲染是CPU密集型，多线程无益
+            rendered = dict(_render(size) for size in render_sizes)
+            
+            results = []
+            decoded = {}
+            for size in sizes:
+                if size in rendered:
+                    # cairosvg 渲染的尺寸直接使用其PNG输出，不经Pillow解码和重新编码
+                    results.append((size, rendered[size]))
+                    continue
+                
+                source_size = min(s for s in render_sizes if s >= size)
+                if source_size not in decoded:
+                    # 确保是RGBA模式，支持透明度
+                    decoded[source_size] = Image.open(io.BytesIO(rendered[source_size])).convert('RGBA')
+                buffer = io.BytesIO()
+                decoded[source_size].resize((size, size), Image.Resampling.LANCZOS).save(buffer, format='PNG')
+                results.append((size, buffer.getvalue()))
             
             # 保存最大尺寸为PNG文件
-            if not os.path.exists(png_path):
-                images[0].save(png_path, format='PNG')
-                print(f"已生成PNG图标: {png_path}")
+            with open(png_path, 'wb') as f:
+                f.write(results[0][1])
+            print(f"已生成PNG图标: {png_path}")
             
-            # 保存为ICO文件，包含多种尺寸
-            if not os.path.exists(ico_path):
-                images[0].save(
-                    ico_path, 
-                    format='ICO', 
-                    sizes=[(img.width, img.height) for img in images]
-                )
-                print(f"已生成ICO图标: {ico_path}")
+            # 保存为ICO文件，直接嵌入已渲染的各尺寸PNG
+            _write_ico(ico_path, results)
+            print(f"已生成ICO图标: {ico_path}")
+            
+            # 记录SVG哈希，SVG未变化时下次构建直接跳过
+            with open(ICON_HASH_PATH, 'w', encoding='utf-8') as f:
+                f.write(_svg_hash(svg_data))
             
             return True
             
@@ -180,16 +468,234 @@ def convert_svg_to_ico():
     
     return False
 
-def build_exe():
-    """构建exe文件"""
+def _find_dict_literal(source_path, name):
+    """从源文件中找到名为 name 的字典字面量（不执行源码）"""
+    tree = ast.parse(Path(source_path).read_text(encoding='utf-8'))
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.Assign) and isinstance(node.value, ast.Dict) and
+                any(isinstance(t, ast.Name) and t.id == name for t in node.targets)):
+            return ast.literal_eval(node.value)
+    return {}
+
+def _imported_modules(source_path, package=None):
+    """静态解析源文件中导入的模块名（含 from X import Y 形式的 X.Y）
+
+    Args:
+        source_path: 源文件路径
+        package: 源文件所在包名，提供时一并解析相对导入
+    """
+    tree = ast.parse(Path(source_path).read_text(encoding='utf-8'))
+    imported = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imported.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level == 0:
+                base = node.module
+            elif package is not None:
+                parts = package.split('.') if package else []
+                parts = parts[:len(parts) - (node.level - 1)]
+                if node.module:
+                    parts.append(node.module)
+                base = '.'.join(parts)
+            else:
+                continue
+            if not base:
+                continue
+            imported.add(base)
+            imported.update(f"{base}.{alias.name}" for alias in node.names)
+    return imported
+
+def collect_internal_modules(entry='src/main.py', src_root='src'):
+    """从入口文件出发，沿导入关系找出 src 下实际用到的模块
+
+    src 下的模块既会以 ui.xxx 形式（--paths=src）也会以 src.ui.xxx
+    形式被导入，这里统一为 src.xxx 形式的模块名，并包含各级包。
+
+    Returns:
+        (排好序的项目模块名列表（不含入口模块本身）,
+         这些模块导入的外部顶层包名集合)
+    """
+    root = Path(src_root)
+    
+    def resolve(name):
+        """把模块名解析为 src 下的文件，非本项目模块返回 None"""
+        parts = name.split('.')
+        if parts[0] == root.name:
+            parts = parts[1:]
+        if not parts:
+            return root / '__init__.py'
+        base = root.joinpath(*parts)
+        for candidate in (base.with_suffix('.py'), base / '__init__.py'):
+            if candidate.is_file():
+                return candidate
+        return None
+    
+    def module_name(path):
+        rel = path.relative_to(root).with_suffix('')
+        parts = [root.name, *rel.parts]
+        if parts[-1] == '__init__':
+            parts.pop()
+        return '.'.join(parts)
+    
+    entry_path = Path(entry)
+    external = set()
+    seen = set()
+    pending = [entry_path]
+    while pending:
+        path = pending.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        name = module_name(path)
+        package = name if path.name == '__init__.py' else name.rpartition('.')[0]
+        for imported in _imported_modules(path, package):
+            target = resolve(imported)
+            if target is None:
+                top_level = imported.split('.')[0]
+                if resolve(top_level) is None:
+                    external.add(top_level)
+            elif target not in seen:
+                pending.append(target)
+    
+    modules = set()
+    for path in seen - {entry_path}:
+        name = module_name(path)
+        parts = name.split('.')
+        # 同时包含各级父包
+        modules.update('.'.join(parts[:i]) for i in range(1, len(parts) + 1))
+    return sorted(modules), external
+
+def mapped_lexer_aliases():
+    """编辑器可能传给 get_lexer_by_name 的全部词法分析器别名
+
+    取 LANGUAGE_MAP / FILENAME_LANGUAGE_MAP 中的语言名和 language_aliases 的键，
+    按 language_aliases 换算后统一转小写（与 get_lexer_by_name 一致）。
+    """
+    language_aliases = _find_dict_literal(*LANGUAGE_ALIAS_SOURCE)
+    languages = set(language_aliases)
+    for source in LANGUAGE_MAP_SOURCES:
+        languages.update(_find_dict_literal(*source).values())
+    return {language_aliases.get(lang, lang).lower() for lang in languages}
+
+def collect_used_lexer_modules():
+    """分析编辑器实际会用到的 Pygments 词法分析器模块
+
+    用 pygments.lexers._mapping.LEXERS 把编辑器映射中的别名换算成模块，
+    再沿模块间的导入关系求出闭包。
+
+    Returns:
+        (用到的模块集合, pygments.lexers 下全部模块集合)，无法分析时返回 None
+    """
+    try:
+        from pygments.lexers._mapping import LEXERS
+        spec = importlib.util.find_spec('pygments.lexers')
+        lexers_dir = Path(spec.origin).parent
+        lexer_names = mapped_lexer_aliases()
+    except (ImportError, AttributeError, OSError, SyntaxError, ValueError) as e:
+        print(f"⚠️  无法分析词法分析器依赖: {e}")
+        return None
+    
+    all_modules = {'pygments.lexers'} | {
+        f'pygments.lexers.{info.name}' for info in pkgutil.iter_modules([str(lexers_dir)])
+    }
+    alias_to_module = {
+        alias: module
+        for module, _, aliases, _, _ in LEXERS.values()
+        for alias in aliases
+    }
+    
+    # 有别名在 LEXERS 中找不到时无法确定需要的模块，宁可全部保留
+    unresolved = sorted(lexer_names - alias_to_module.keys())
+    if unresolved:
+        print(f"⚠️  以下语言在 Pygments 中没有对应的词法分析器，不排除任何模块: {', '.join(unresolved)}")
+        return None
+    
+    # 从包本身和用到的词法分析器模块出发，求导入闭包
+    pending = ['pygments.lexers'] + sorted(alias_to_module[name] for name in lexer_names)
+    used = set()
+    while pending:
+        module = pending.pop()
+        if module in used:
+            continue
+        used.add(module)
+        if module == 'pygments.lexers':
+            source_path = lexers_dir / '__init__.py'
+        else:
+            source_path = lexers_dir / f"{module.rsplit('.', 1)[1]}.py"
+        pending.extend(m for m in _imported_modules(source_path) if m in all_modules and m not in used)
+    
+    return used, all_modules
+
+def write_filtered_spec(spec_options, exe_name):
+    """生成 spec 文件并加入 Qt 动态库过滤
+
+    PyInstaller 命令行无法按文件过滤 PyQt6 钩子收集的动态库，
+    因此先用 makespec 生成 spec，再在 Analysis 之后插入过滤代码。
+
+    Args:
+        spec_options: 传给 makespec 的选项及脚本路径
+        exe_name: 可执行文件名（同时是 spec 文件名）
+
+    Returns:
+        str: spec 文件路径，生成失败时返回 None
+    """
+    makespec_cmd = [sys.executable, '-m', 'PyInstaller.utils.cliutils.makespec', *spec_options]
+    result = subprocess.run(makespec_cmd, cwd=ROOT, text=True)
+    spec_path = f'{exe_name}.spec'
+    if result.returncode != 0 or not os.path.exists(spec_path):
+        print("❌ 生成 spec 文件失败")
+        return None
+    
+    with open(spec_path, 'r', encoding='utf-8') as f:
+        spec = f.read()
+    
+    marker = 'pyz = PYZ('
+    if marker not in spec:
+        print("⚠️  spec 文件格式无法识别，跳过 Qt 动态库过滤")
+        return spec_path
+    
+    filter_block = QT_FILTER_BLOCK.format(
+        binaries=QT_EXCLUDED_BINARIES,
+        prefixes=tuple(QT_EXCLUDED_PREFIXES)
+    )
+    spec = spec.replace(marker, filter_block + marker, 1)
+    with open(spec_path, 'w', encoding='utf-8') as f:
+        f.write(spec)
+    
+    print(f"✂️  过滤 Qt 动态库: {', '.join(QT_EXCLUDED_BINARIES)}")
+    return spec_path
+
+def build_exe(cfg=None):
+    """构建exe文件
+
+    Args:
+        cfg: 构建配置，默认使用 BuildConfig()
+    """
+    if cfg is None:
+        cfg = BuildConfig()
+    
     print("开始构建 Chango Editor 可执行文件...")
     print("="*60)
     
-    # 清理旧的构建文件
-    clean_build_dirs()
+    set_reproducible_env()
     
-    # 验证依赖
-    if not verify_dependencies():
+    # 源码未变化时保留 build 目录，让 PyInstaller 复用上次的分析结果
+    src_hash = source_hash()
+    incremental = not cfg.full_rebuild and sources_unchanged(src_hash)
+    if incremental:
+        print("♻️  源码未变化，复用上次的构建缓存")
+    
+    # 清理旧的构建文件与验证依赖互不影响，在后台线程清理的同时验证依赖；
+    # 清理结果在验证完成后再输出，避免两边的输出交错
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        clean_future = executor.submit(clean_build_dirs, keep_build=incremental, verbose=False)
+        deps_ok = verify_dependencies() if cfg.verify else True
+        cleaned = clean_future.result()
+    for dir_name in cleaned:
+        print(f"已清理目录: {dir_name}")
+    
+    if not deps_ok:
         print("❌ 依赖验证失败，无法继续构建")
         return False
     
@@ -199,18 +705,26 @@ def build_exe():
     # 获取pyinstaller路径
     pyinstaller_path = 'Scripts/pyinstaller.exe' if os.path.exists('Scripts/pyinstaller.exe') else 'pyinstaller'
     
-    # 构建PyInstaller命令
+    # 字节码优化（级别2即 -OO，去除文档字符串和断言）
+    # 新版本写入 spec 文件，旧版本通过 python -OO 运行 PyInstaller
+    pyinstaller_cmd = [pyinstaller_path]
+    optimize_options = []
+    if cfg.optimize:
+        if pyinstaller_supports_optimize():
+            optimize_options = [f'--optimize={cfg.optimize}']
+        else:
+            pyinstaller_cmd = [sys.executable, '-' + 'O' * cfg.optimize, '-m', 'PyInstaller']
+    
+    # 构建 spec 生成选项
     exe_name = f"{APP_NAME}-v{APP_VERSION}" if APP_VERSION else APP_NAME
     
-    cmd = [
-        pyinstaller_path,
-        '--onefile',           # 单文件模式
+    bundle_mode = '--onefile' if cfg.onefile else '--onedir'
+    
+    spec_options = [
+        bundle_mode,           # 打包模式（默认目录模式）
         '--windowed',          # 无控制台模式
         f'--name={exe_name}',  # 可执行文件名（带版本号）
-        '--clean',             # 清理临时文件
-        '--noconfirm',         # 覆盖输出目录而不确认
-        '--distpath=dist',     # 指定输出目录
-        '--workpath=build',    # 指定工作目录
+        *optimize_options,
         
         # PyQt6 相关模块
         '--hidden-import=PyQt6.QtCore',
@@ -222,47 +736,18 @@ def build_exe():
         '--hidden-import=pygments',
         '--hidden-import=pygments.lexers',
         '--hidden-import=pygments.formatters',
-        '--hidden-import=pygments.lexers.python',
-        '--hidden-import=pygments.lexers.web',
-        '--hidden-import=pygments.lexers.shell',
-        '--hidden-import=pygments.lexers.data',
-        
-        # 文件编码检测
-        '--hidden-import=chardet',
-        
-        # 文件监控
-        '--hidden-import=watchdog',
-        '--hidden-import=watchdog.observers',
-        '--hidden-import=watchdog.events',
         
-        # Git 支持（可选）
-        '--hidden-import=git',
-        '--hidden-import=gitdb',
-        '--hidden-import=smmap',
-        
-        # Chango Editor 核心模块
-        '--hidden-import=src',
-        '--hidden-import=src.ui',
-        '--hidden-import=src.ui.main_window',
-        '--hidden-import=src.ui.tab_widget',
-        '--hidden-import=src.ui.file_explorer',
-        '--hidden-import=src.ui.search_dialog',
-        '--hidden-import=src.ui.new_file_dialog',
-        '--hidden-import=src.ui.split_view',
-        '--hidden-import=src.ui.language_selector',  # 国际化 UI
-        '--hidden-import=src.core',
-        '--hidden-import=src.core.editor',
-        '--hidden-import=src.core.document',
-        '--hidden-import=src.core.selection',
-        '--hidden-import=src.core.undo_redo',
-        '--hidden-import=src.core.i18n',  # 国际化核心模块
-        '--hidden-import=src.utils',
-        '--hidden-import=src.utils.syntax',
-        '--hidden-import=src.utils.themes',
-        '--hidden-import=src.utils.settings',
-        '--hidden-import=src.utils.file_templates',
-        '--hidden-import=src.utils.file_watcher',
-        '--hidden-import=src.utils.git_utils',
+        # 排除编辑器用不到的模块，减小打包体积
+        '--exclude-module=PyQt6.QtBluetooth',
+        '--exclude-module=PyQt6.QtMultimedia',
+        '--exclude-module=PyQt6.QtNetwork',
+        '--exclude-module=PyQt6.QtWebEngineCore',
+        '--exclude-module=PyQt6.QtQml',
+        '--exclude-module=chardet',      # 编码识别由 utils.charset_sniff 完成
+        '--exclude-module=tkinter',
+        '--exclude-module=unittest',
+        '--exclude-module=pydoc_data',
+        '--exclude-module=test',
         
         # 添加源码路径
         '--paths=src',
@@ -271,15 +756,50 @@ def build_exe():
         'src/main.py'
     ]
     
+    # Chango Editor 核心模块：从 main.py 沿导入关系静态分析得到
+    internal_modules, external_packages = collect_internal_modules()
+    spec_options.extend(f'--hidden-import={m}' for m in internal_modules)
+    print(f"🧩 项目模块: {len(internal_modules)} 个")
+    
+    # 可选第三方依赖：只有源码实际导入时才打包
+    for package, modules in OPTIONAL_HIDDEN_IMPORTS.items():
+        if package in external_packages:
+            spec_options.extend(f'--hidden-import={m}' for m in modules)
+        else:
+            print(f"⏭️  源码未使用 {package}，不打包")
+    
+    # 只打包编辑器语言映射会用到的词法分析器，排除其余模块。
+    # 注意：这要求编辑器只通过 get_lexer_by_name 加载语言映射/language_aliases 中的语言；
+    # guess_lexer、get_lexer_for_filename 等会按需导入任意词法分析器模块，
+    # 打包后的程序中会因模块被排除而出现 ImportError（开发环境中不会暴露）
+    lexer_modules = collect_used_lexer_modules()
+    if lexer_modules is not None:
+        used_lexers, all_lexers = lexer_modules
+        spec_options.extend(f'--hidden-import={m}' for m in sorted(used_lexers - {'pygments.lexers'}))
+        spec_options.extend(f'--exclude-module={m}' for m in sorted(all_lexers - used_lexers))
+        print(f"🎨 词法分析器模块: 打包 {len(used_lexers)} 个，排除 {len(all_lexers - used_lexers)} 个")
+    else:
+        spec_options.extend([
+            '--hidden-import=pygments.lexers.python',
+            '--hidden-import=pygments.lexers.web',
+            '--hidden-import=pygments.lexers.shell',
+            '--hidden-import=pygments.lexers.data',
+        ])
+    
+    # 不使用UPX压缩，避免启动时解压
+    if not cfg.upx:
+        spec_options.append('--noupx')
+    
     print(f"\n📦 构建 {APP_DISPLAY_NAME} v{APP_VERSION}")
     print(f"📋 EXE文件名: {exe_name}.exe")
+    print(f"📦 打包模式: {'onefile (单文件)' if cfg.onefile else 'onedir (目录)'}")
     
     # 自动添加所有主题文件
     theme_dir = Path('resources/themes')
     if theme_dir.exists():
-        theme_files = list(theme_dir.glob('*.json'))
-        for theme_file in theme_files:
-            cmd.extend(['--add-data', f'{theme_file};resources/themes'])
+        theme_files = sorted(theme_dir.glob('*.json'))
+        for theme_file in compress_themes(theme_files):
+            spec_options.extend(['--add-data', f'{theme_file};resources/themes'])
             print(f"✅ 添加主题: {theme_file.name}")
         print(f"📦 总计 {len(theme_files)} 个主题文件")
     else:
@@ -288,60 +808,91 @@ def build_exe():
     # 自动添加所有国际化语言文件（新增）
     i18n_dir = Path('resources/i18n/locales')
     if i18n_dir.exists():
-        locale_files = list(i18n_dir.glob('*.json'))
+        locale_files = sorted(i18n_dir.glob('*.json'))
         for locale_file in locale_files:
-            cmd.extend(['--add-data', f'{locale_file};resources/i18n/locales'])
+            spec_options.extend(['--add-data', f'{locale_file};resources/i18n/locales'])
             print(f"✅ 添加语言: {locale_file.stem}")
         print(f"🌍 总计 {len(locale_files)} 个语言文件")
     else:
         print("⚠️  警告: resources/i18n/locales 目录不存在")
     
-    # 添加图标文件
-    icon_files = [
-        'resources/icons/chango_editor.svg',
-        'resources/icons/chango_editor.png', 
-        'resources/icons/chango_editor.ico'
-    ]
+    # 添加图标文件（一次性检查存在的图标）
+    icon_files = [ICON_SVG_PATH, ICON_PNG_PATH, ICON_ICO_PATH]
+    existing_icons = [icon_file for icon_file in icon_files if Path(icon_file).exists()]
     
-    for icon_file in icon_files:
-        if os.path.exists(icon_file):
-            cmd.extend(['--add-data', f'{icon_file};resources/icons'])
-            print(f"添加图标文件: {icon_file}")
+    for icon_file in existing_icons:
+        spec_options.extend(['--add-data', f'{icon_file};resources/icons'])
+        print(f"添加图标文件: {icon_file}")
     
     # 如果有ico文件，设置为程序图标
-    ico_path = 'resources/icons/chango_editor.ico'
-    if os.path.exists(ico_path):
-        cmd.extend(['--icon', ico_path])
-        print(f"设置程序图标: {ico_path}")
+    if ICON_ICO_PATH in existing_icons:
+        spec_options.extend(['--icon', ICON_ICO_PATH])
+        print(f"设置程序图标: {ICON_ICO_PATH}")
     
     print("\n执行打包命令...")
     print("="*60)
-    print(f"命令预览: pyinstaller --onefile --windowed --name={exe_name} ...")
+    print(f"命令预览: pyinstaller {bundle_mode} --windowed --name={exe_name} ...")
     
     try:
+        # 生成带 Qt 动态库过滤的 spec 文件
+        spec_path = write_filtered_spec(spec_options, exe_name)
+        if spec_path is None:
+            return False
+        
+        build_cmd = [
+            *pyinstaller_cmd,
+            '--noconfirm',         # 覆盖输出目录而不确认
+            '--distpath=dist',     # 指定输出目录
+            '--workpath=build',    # 指定工作目录
+        ]
+        # 源码有变化时清理 PyInstaller 缓存
+        if not incremental:
+            build_cmd.append('--clean')
+        build_cmd.append(spec_path)
+        
         # 执行打包命令
-        result = subprocess.run(cmd, cwd=os.getcwd(), text=True)
+        result = subprocess.run(build_cmd, cwd=ROOT, text=True)
         
         if result.returncode == 0:
             print("\n" + "="*60)
             print("✅ 打包成功!")
             
-            exe_path = f'dist/{exe_name}.exe'
+            # 记录源码哈希，供下次增量构建判断
+            with open(SOURCE_HASH_PATH, 'w', encoding='utf-8') as f:
+                f.write(src_hash)
+            
+            if cfg.onefile:
+                exe_path = f'dist/{exe_name}.exe'
+            else:
+                exe_path = f'dist/{exe_name}/{exe_name}.exe'
             if os.path.exists(exe_path):
                 print(f"📁 可执行文件位置: {os.path.abspath(exe_path)}")
                 print(f"📋 文件名: {exe_name}.exe")
                 print(f"🔖 版本号: v{APP_VERSION}")
                 
-                # 显示文件大小
-                size_mb = os.path.getsize(exe_path) / (1024 * 1024)
-                print(f"📊 文件大小: {size_mb:.1f} MB")
+                # 显示文件大小（目录模式统计整个程序目录）
+                if cfg.onefile:
+                    size_mb = os.stat(exe_path).st_size / MB
+                    print(f"📊 文件大小: {size_mb:.1f} MB")
+                else:
+                    total_size = _dir_size(f'dist/{exe_name}')
+                    print(f"📊 目录大小: {total_size / MB:.1f} MB")
+                
+                # 发布时将目录模式的输出打包成zip便于分发（本地构建无需压缩）
+                if not cfg.onefile and cfg.zip:
+                    zip_path = shutil.make_archive(f'dist/{exe_name}', 'zip', 'dist', exe_name)
+                    print(f"🗜️  分发压缩包: {os.path.abspath(zip_path)}")
                 
                 print("\n📝 使用说明:")
                 print("- ✅ 完全独立的可执行文件，无需安装Python")
                 print("- ✅ 支持8种语言界面（简中、英、日、马来、韩、俄、西、繁中）")
                 print("- ✅ 包含7个精美主题")
-                print("- ✅ 可以直接分发给其他用户使用")  
-                print("- ✅ 首次运行可能需要一些时间来解压")
+                if cfg.onefile:
+                    print("- ✅ 可以直接分发给其他用户使用")
+                    print("- ✅ 首次运行可能需要一些时间来解压")
+                elif cfg.zip:
+                    print(f"- ✅ 分发时请发送 {exe_name}.zip，解压后运行其中的 {exe_name}.exe")
+                    print("- ✅ 无需每次启动解压，启动速度更快")
                 print("- ✅ 支持拖拽文件到编辑器窗口打开")
                 print(f"- ✅ 支持命令行参数: {exe_name}.exe [文件路径]")
                 
@@ -356,7 +907,7 @@ def build_exe():
             print("\n" + "="*60)
             print("❌ 打包失败!")
             print("请检查上面的错误信息或运行以下命令获取详细日志:")
-            print(f"pyinstaller {' '.join(cmd[1:])}")
+            print(f"pyinstaller {' '.join(build_cmd[len(pyinstaller_cmd):])}")
             return False
             
     except FileNotFoundError:
@@ -371,18 +922,146 @@ def build_exe():
     
     return True
 
-def main():
+def build_nuitka_exe(cfg=None):
+    """使用 Nuitka 将程序编译为本机代码（无需 PyInstaller 引导程序解包）
+
+    Args:
+        cfg: 构建配置，默认使用 BuildConfig()
+    """
+    if cfg is None:
+        cfg = BuildConfig()
+    
+    print("开始使用 Nuitka 构建 Chango Editor 可执行文件...")
+    print("="*60)
+    
+    if importlib.util.find_spec('nuitka') is None:
+        print("❌ Nuitka 未安装")
+        print("请运行: pip install nuitka")
+        return False
+    
+    set_reproducible_env()
+    clean_build_dirs(keep_build=not cfg.full_rebuild)
+    
+    if cfg.verify and not verify_dependencies():
+        print("❌ 依赖验证失败，无法继续构建")
+        return False
+    
+    convert_svg_to_ico()
+    
+    exe_name = f"{APP_NAME}-v{APP_VERSION}" if APP_VERSION else APP_NAME
+    
+    cmd = [
+        sys.executable, '-m', 'nuitka',
+        '--onefile' if cfg.onefile else '--standalone',
+        '--lto=yes',
+        '--enable-plugin=pyqt6',
+        '--windows-console-mode=disable',
+        '--nofollow-import-to=tkinter,unittest,test,PIL,cairosvg,chardet',
+        '--noinclude-qt-translations',
+        '--assume-yes-for-downloads',
+        '--output-dir=dist',
+        f'--output-filename={exe_name}.exe',
+        '--include-data-dir=resources/i18n/locales=resources/i18n/locales',
+    ]
+    
+    # 字节码优化对应 Nuitka 的去除文档字符串和断言
+    if cfg.optimize >= 1:
+        cmd.append('--python-flag=no_asserts')
+    if cfg.optimize >= 2:
+        cmd.append('--python-flag=no_docstrings')
+    
+    theme_files = sorted(Path('resources/themes').glob('*.json'))
+    for theme_file in compress_themes(theme_files):
+        cmd.append(f'--include-data-files={theme_file}=resources/themes/{theme_file.name}')
+    print(f"📦 总计 {len(theme_files)} 个主题文件")
+    
+    for icon_file in [ICON_SVG_PATH, ICON_PNG_PATH, ICON_ICO_PATH]:
+        if Path(icon_file).exists():
+            cmd.append(f'--include-data-files={icon_file}=resources/icons/{Path(icon_file).name}')
+    if Path(ICON_ICO_PATH).exists():
+        cmd.append(f'--windows-icon-from-ico={ICON_ICO_PATH}')
+    
+    cmd.append('src/main.py')
+    
+    print(f"\n📦 构建 {APP_DISPLAY_NAME} v{APP_VERSION} (Nuitka)")
+    print(f"📦 打包模式: {'onefile (单文件)' if cfg.onefile else 'standalone (目录)'}")
+    print("\n执行编译命令...")
+    print("="*60)
+    
+    result = subprocess.run(cmd, cwd=ROOT, text=True)
+    if result.returncode != 0:
+        print("\n" + "="*60)
+        print("❌ Nuitka 编译失败!")
+        return False
+    
+    if cfg.onefile:
+        exe_path = f'dist/{exe_name}.exe'
+    else:
+        # Nuitka 输出到 dist/main.dist，改名为与 PyInstaller 相同的目录结构
+        shutil.move('dist/main.dist', f'dist/{exe_name}')
+        exe_path = f'dist/{exe_name}/{exe_name}.exe'
+        if cfg.zip:
+            zip_path = shutil.make_archive(f'dist/{exe_name}', 'zip', 'dist', exe_name)
+            print(f"🗜️  分发压缩包: {os.path.abspath(zip_path)}")
+    
+    print("\n" + "="*60)
+    print("✅ 编译成功!")
+    print(f"📁 可执行文件位置: {os.path.abspath(exe_path)}")
+    return True
+
+def parse_args(argv=None):
+    """解析命令行参数为构建配置"""
+    parser = argparse.ArgumentParser(description=f"{APP_DISPLAY_NAME} PyInstaller 打包脚本")
+    parser.add_argument('--onefile', action='store_true', default=ONEFILE,
+                        help='打包为单文件（默认目录模式，也可设置 PYINSTALLER_BUILD_ONEFILE=yes）')
+    parser.add_argument('--no-verify', dest='verify', action='store_false',
+                        help='跳过构建依赖验证')
+    parser.add_argument('--optimize', type=int, choices=[0, 1, 2], default=2,
+                        help='字节码优化级别（默认2）')
+    parser.add_argument('--upx', action='store_true',
+                        help='使用UPX压缩（会增加启动时间）')
+    parser.add_argument('--full-rebuild', action='store_true',
+                        help='清理 build 缓存后完全重新构建')
+    parser.add_argument('--backend', choices=['pyinstaller', 'nuitka'], default='pyinstaller',
+                        help='打包后端（默认 pyinstaller，nuitka 编译为本机代码）')
+    parser.add_argument('--zip', action='store_true',
+                        help='目录模式下额外生成分发用的zip压缩包（发布时使用）')
+    args = parser.parse_args(argv)
+    return BuildConfig(
+        onefile=args.onefile,
+        verify=args.verify,
+        optimize=args.optimize,
+        upx=args.upx,
+        full_rebuild=args.full_rebuild,
+        backend=args.backend,
+        zip=args.zip
+    )
+
+def main(argv=None):
     """主函数"""
+    cfg = parse_args(argv)
+    
+    # 允许从任意目录运行构建脚本
+    os.chdir(ROOT)
+    
     print(f"{APP_DISPLAY_NAME} v{APP_VERSION} 构建工具")
     print("="*60)
     
-    success = build_exe()
+    if cfg.backend == 'nuitka':
+        success = build_nuitka_exe(cfg)
+    else:
+        success = build_exe(cfg)
     
     if success:
         print(f"\n🎉 {APP_DISPLAY_NAME} v{APP_VERSION} 打包完成!")
         print("="*60)
         print("\n📦 生成的文件包含:")
-        print(f"  • {APP_NAME}-v{APP_VERSION}.exe (便携版)")
+        if cfg.onefile:
+            print(f"  • {APP_NAME}-v{APP_VERSION}.exe (便携版)")
+        else:
+            print(f"  • {APP_NAME}-v{APP_VERSION}/ (程序目录)")
+            if cfg.zip:
+                print(f"  • {APP_NAME}-v{APP_VERSION}.zip (便携版压缩包)")
         print("  • 7个精美主题")
         print("  • 8种语言界面")
         print("  • 完整功能支持")
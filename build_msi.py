@@ -24,15 +24,19 @@ Chango Editor MSI安装包构建脚本
 import os
 import sys
 import shutil
+import gzip
+import functools
+import hashlib
 import subprocess
+import uuid
 from pathlib import Path
 from cx_Freeze import setup, Executable
 
-# 设置 UTF-8 编码输出
-if sys.platform == 'win32':
-    import io
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+# 设置 UTF-8 编码输出（原地切换编码，子进程也使用UTF-8模式）
+if sys.platform == 'win32' and sys.stdout.encoding.lower() != 'utf-8':
+    os.environ.setdefault('PYTHONUTF8', '1')
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+    sys.stderr.reconfigure(encoding='utf-8', errors='replace')
 
 # 从统一版本配置文件导入版本信息
 try:
@@ -57,25 +61,46 @@ except ImportError:
     APP_URL = "https://github.com/wyg5208/changoeditor"
     RELEASE_TITLE = f"{APP_DISPLAY_NAME} v{APP_VERSION}"
 
+# 文件大小换算单位
+MB = 1 << 20
+
+# 项目根目录（脚本所在目录），所有路径都以此为基准拼成绝对路径，
+# 因此允许从任意目录运行或导入本脚本，且不会改变调用方的当前目录
+ROOT = Path(__file__).resolve().parent
+
+# cx_Freeze 构建结果缓存目录（按源码内容哈希存放）
+CX_CACHE_DIR = ROOT / '.cx_cache'
+
+# MSI 升级代码，各版本必须保持不变
+UPGRADE_CODE = uuid.UUID('12345678-1234-1234-1234-123456789012')
+
+def component_guid(component_id):
+    """根据升级代码和组件ID生成稳定的组件GUID
+
+    组件GUID在各版本间保持不变，Windows Installer 才能识别未变化的文件。
+    """
+    return '{' + str(uuid.uuid5(UPGRADE_CODE, component_id)).upper() + '}'
+
+@functools.lru_cache(maxsize=1)
 def get_icon_path():
-    """获取图标文件路径"""
+    """获取图标文件路径（结果缓存，构建过程中只查找一次）"""
     icon_paths = [
-        'resources/icons/chango_editor.ico',
-        'resources/icons/chango_editor.png',
-        'resources/icons/chango_editor.svg'
+        ROOT / 'resources/icons/chango_editor.ico',
+        ROOT / 'resources/icons/chango_editor.png',
+        ROOT / 'resources/icons/chango_editor.svg'
     ]
     
     for icon_path in icon_paths:
-        if os.path.exists(icon_path):
-            return icon_path
+        if icon_path.exists():
+            return str(icon_path)
     return None
 
 def clean_build():
     """清理构建目录"""
     dirs_to_clean = ['build', 'dist']
     for dir_name in dirs_to_clean:
-        if os.path.exists(dir_name):
-            shutil.rmtree(dir_name)
+        if (ROOT / dir_name).exists():
+            shutil.rmtree(ROOT / dir_name)
             print(f"已清理目录: {dir_name}")
 
 def prepare_build():
@@ -89,7 +114,7 @@ def prepare_build():
     ]
     
     for file_path in required_files:
-        if not os.path.exists(file_path):
+        if not (ROOT / file_path).exists():
             print(f"❌ 缺少必需文件: {file_path}")
             return False
         print(f"✅ {file_path}")
@@ -100,18 +125,23 @@ def prepare_build():
 include_files = []
 
 # 添加主题文件
-theme_dir = Path('resources/themes')
+theme_dir = ROOT / 'resources/themes'
 if theme_dir.exists():
-    for theme_file in theme_dir.glob('*.json'):
-        include_files.append((str(theme_file), f"resources/themes/{theme_file.name}"))
-        print(f"✅ 添加主题: {theme_file.name}")
+    # 主题文件压缩为 .json.gz 后打包，主题管理器可直接读取
+    compressed_dir = ROOT / 'build/themes'
+    compressed_dir.mkdir(parents=True, exist_ok=True)
+    for theme_file in sorted(theme_dir.glob('*.json')):
+        gz_path = compressed_dir / f"{theme_file.name}.gz"
+        gz_path.write_bytes(gzip.compress(theme_file.read_bytes(), 9, mtime=0))
+        include_files.append((str(gz_path), f"resources/themes/{gz_path.name}"))
+        print(f"✅ 添加主题: {gz_path.name}")
 else:
     print("⚠️  警告: resources/themes 目录不存在")
 
 # 添加国际化文件（i18n）
-i18n_dir = Path('resources/i18n/locales')
+i18n_dir = ROOT / 'resources/i18n/locales'
 if i18n_dir.exists():
-    for locale_file in i18n_dir.glob('*.json'):
+    for locale_file in sorted(i18n_dir.glob('*.json')):
         include_files.append((str(locale_file), f"resources/i18n/locales/{locale_file.name}"))
         print(f"✅ 添加语言: {locale_file.stem}")
 else:
@@ -124,20 +154,29 @@ icon_files = [
     'resources/icons/chango_editor.ico'
 ]
 
+# 一次读取目录列表，代替逐个文件检查是否存在
+icon_names = set()
+if (ROOT / 'resources/icons').is_dir():
+    with os.scandir(ROOT / 'resources/icons') as it:
+        icon_names = {e.name for e in it if e.is_file()}
+
 for icon_file in icon_files:
-    if os.path.exists(icon_file):
-        include_files.append((icon_file, f"resources/icons/{os.path.basename(icon_file)}"))
+    if os.path.basename(icon_file) in icon_names:
+        include_files.append((str(ROOT / icon_file), f"resources/icons/{os.path.basename(icon_file)}"))
         print(f"添加图标文件: {icon_file}")
 
+with os.scandir(ROOT) as it:
+    root_entries = {e.name: e for e in it}
+
 # 添加许可证和说明文件
-if os.path.exists("LICENSE"):
-    include_files.append(("LICENSE", "LICENSE.txt"))
-if os.path.exists("README.md"):
-    include_files.append(("README.md", "README.txt"))
+if "LICENSE" in root_entries:
+    include_files.append((str(ROOT / "LICENSE"), "LICENSE.txt"))
+if "README.md" in root_entries:
+    include_files.append((str(ROOT / "README.md"), "README.txt"))
 
 # 添加示例文件
-if os.path.exists("test_files"):
-    include_files.append(("test_files", "examples"))
+if "test_files" in root_entries and root_entries["test_files"].is_dir():
+    include_files.append((str(ROOT / "test_files"), "examples"))
 
 # 构建选项
 build_exe_options = {
@@ -149,23 +188,16 @@ build_exe_options = {
         "PyQt6.QtWidgets",
         "PyQt6.QtPrintSupport",
         
-        # 语法高亮
+        # 语法高亮（pygments.lexers 整个包已包含全部词法分析器，按需延迟加载）
         "pygments",
         "pygments.lexers",
         "pygments.formatters",
-        "pygments.lexers.python",
-        "pygments.lexers.web",
-        "pygments.lexers.shell",
-        "pygments.lexers.data",
         
         # 文件监控
         "watchdog",
         "watchdog.observers",
         "watchdog.events",
         
-        # 文件编码检测
-        "chardet",
-        
         # Python标准库（必需）
         "urllib",
         "urllib.parse",
@@ -183,16 +215,22 @@ build_exe_options = {
     "includes": [
         "urllib.parse",
         "pathlib",
+        "pygments.lexers._mapping",  # 词法分析器注册表，按名称查找时使用
     ],
     "excludes": [
         "tkinter",
+        "chardet",
         "unittest",
         "test",
         "tests"
     ],
     "include_files": include_files,
-    "build_exe": "build/exe",
+    "build_exe": str(ROOT / "build" / "exe"),
     "optimize": 2,
+    # 模块打包进 library.zip，而不是散落的 .pyc 文件，减少启动时的文件系统调用；
+    # PyQt6 的Qt插件按文件路径加载，需保留在目录中
+    "zip_include_packages": ["*"],
+    "zip_exclude_packages": ["PyQt6"],
 }
 
 # MSI选项
@@ -211,7 +249,7 @@ bdist_msi_options = {
 # 可执行文件定义
 executables = [
     Executable(
-        script="src/main.py",
+        script=str(ROOT / "src" / "main.py"),
         base="Win32GUI",  # Windows GUI应用
         target_name="ChangoEditor.exe",
         icon=get_icon_path(),
@@ -220,130 +258,173 @@ executables = [
     )
 ]
 
+def source_hash():
+    """计算影响 cx_Freeze 构建结果的文件内容哈希
+
+    包括源码、资源文件、依赖版本和本脚本（构建选项）。
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    files = sorted((ROOT / 'src').rglob('*.py')) + sorted(
+        p for p in (ROOT / 'resources').rglob('*') if p.is_file()
+    )
+    files += [ROOT / 'requirements.txt', Path(__file__).resolve()]
+    for path in files:
+        if path.exists():
+            # 按相对路径计入哈希，项目目录位置不影响结果
+            digest.update(str(path.relative_to(ROOT)).encode('utf-8'))
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
 def build_msi():
     """构建MSI安装包"""
+    build_dir = Path(build_exe_options["build_exe"])
+    sentinel = build_dir / '.build_complete'
+    msi_path = ROOT / 'dist' / bdist_msi_options["target_name"]
+    src_hash = source_hash()
+    
+    # 上次构建后源码未变化且MSI仍在，无需任何操作
+    if msi_path.exists() and sentinel.exists() and sentinel.read_text(encoding='utf-8') == src_hash:
+        print(f"✅ MSI 已是最新，跳过构建: {msi_path}")
+        return True
+    
     if not prepare_build():
         return False
     
     print("开始构建MSI安装包...")
     
-    # 运行cx_Freeze构建
-    setup(
-        name=APP_NAME,
-        version=APP_VERSION,
-        description=APP_DESCRIPTION,
-        author=APP_AUTHOR,
-        url=APP_URL,
-        options={
-            "build_exe": build_exe_options,
-            "bdist_msi": bdist_msi_options
-        },
-        executables=executables
-    )
-
-def create_advanced_msi():
-    """创建高级MSI安装包（使用WiX工具链）"""
-    print("创建高级MSI安装包...")
-    
-    # WiX源文件
-    wxs_content = f'''<?xml version="1.0" encoding="UTF-8"?>
-<Wix xmlns="http://schemas.microsoft.com/wix/2006/wi">
-  <Product Id="*" 
-           Name="{APP_NAME}" 
-           Language="2052" 
-           Version="{APP_VERSION}" 
-           Manufacturer="{APP_AUTHOR}" 
-           UpgradeCode="{{12345678-1234-1234-1234-123456789012}}">
+    # 源码未变化时复用缓存的 build/exe，跳过 cx_Freeze 的模块分析和编译
+    cached_dir = CX_CACHE_DIR / src_hash / 'exe'
+    cache_hit = cached_dir.exists()
+    if cache_hit:
+        print(f"♻️  源码未变化，复用缓存: {cached_dir}")
+        if build_dir.exists():
+            shutil.rmtree(build_dir)
+        shutil.copytree(cached_dir, build_dir)
+        bdist_msi_options["skip_build"] = True
     
-    <Package InstallerVersion="200" 
-             Compressed="yes" 
-             InstallScope="perUser" 
-             Description="{APP_DESCRIPTION}" />
+    # 运行cx_Freeze构建（setuptools 按当前目录放置 dist 等输出，
+    # 因此只在 setup 期间切换到项目根目录，结束后恢复）
+    cwd = os.getcwd()
+    os.chdir(ROOT)
+    try:
+        setup(
+            name=APP_NAME,
+            version=APP_VERSION,
+            description=APP_DESCRIPTION,
+            author=APP_AUTHOR,
+            url=APP_URL,
+            options={
+                "build_exe": build_exe_options,
+                "bdist_msi": bdist_msi_options
+            },
+            executables=executables
+        )
+    finally:
+        os.chdir(cwd)
     
-    <MajorUpgrade DowngradeErrorMessage="已安装更新版本的 {APP_NAME}。" />
+    # 保存本次构建结果，只保留最新的一份缓存
+    if not cache_hit and build_dir.exists():
+        if CX_CACHE_DIR.exists():
+            shutil.rmtree(CX_CACHE_DIR)
+        shutil.copytree(build_dir, cached_dir)
     
-    <MediaTemplate EmbedCab="yes" />
+    # 记录本次构建对应的源码哈希，下次源码未变化时直接跳过
+    if build_dir.exists():
+        sentinel.write_text(src_hash, encoding='utf-8')
+    return True
+
+def find_pyinstaller_output():
+    """查找 build_exe.py 生成的目录模式输出
+
+    Returns:
+        tuple: (程序目录, exe路径)，未构建时返回 None
+    """
+    exe_name = f"{APP_NAME}-v{APP_VERSION}"
+    dist_dir = ROOT / 'dist' / exe_name
+    exe_path = dist_dir / f"{exe_name}.exe"
+    if not exe_path.exists():
+        return None
+    return dist_dir, exe_path
+
+def find_wix_tools():
+    """查找 WiX 工具链（heat、candle、light），缺少任一工具时返回 None"""
+    tools = [shutil.which(name) for name in ('heat', 'candle', 'light')]
+    return tools if all(tools) else None
+
+def run_wix_toolchain(wix_tools, wxs_path, internal_dir):
+    """在当前进程中依次调用 heat、candle、light 生成MSI
+
+    Args:
+        wix_tools: find_wix_tools() 返回的工具路径
+        wxs_path: 主 WiX 源文件
+        internal_dir: PyInstaller 输出中的 _internal 目录
+    """
+    heat, candle, light = wix_tools
+    fragment_path = 'installer/internal_files.wxs'
+    obj_dir = os.path.join('build', 'wix', '')
+    (ROOT / obj_dir).mkdir(parents=True, exist_ok=True)
     
-    <Feature Id="ProductFeature" Title="{APP_NAME}" Level="1">
-      <ComponentGroupRef Id="ProductComponents" />
-      <ComponentRef Id="DesktopShortcut" />
-      <ComponentRef Id="StartMenuShortcut" />
-    </Feature>
+    # 收集 _internal 下的全部文件，生成组件片段
+    subprocess.run([
+        heat, 'dir', str(internal_dir),
+        '-cg', 'InternalComponents', '-dr', 'INTERNALFOLDER',
+        '-ag', '-srd', '-scom', '-sreg', '-sfrag',
+        '-var', 'var.InternalDir', '-out', fragment_path
+    ], cwd=ROOT, check=True)
     
-    <Directory Id="TARGETDIR" Name="SourceDir">
-      <Directory Id="LocalAppDataFolder">
-        <Directory Id="INSTALLFOLDER" Name="{APP_NAME}" />
-      </Directory>
-      
-      <Directory Id="DesktopFolder" Name="Desktop" />
-      
-      <Directory Id="ProgramMenuFolder" Name="Programs">
-        <Directory Id="ApplicationProgramsFolder" Name="{APP_NAME}" />
-      </Directory>
-    </Directory>
+    subprocess.run([
+        candle, f'-dInternalDir={internal_dir}', '-out', obj_dir,
+        wxs_path, fragment_path
+    ], cwd=ROOT, check=True)
     
-    <ComponentGroup Id="ProductComponents" Directory="INSTALLFOLDER">
-      <Component Id="MainExecutable" Guid="*">
-        <File Id="ChangoEditorExe" 
-              Source="dist\\ChangoEditor.exe" 
-              KeyPath="yes" />
-      </Component>
-      
-      <Component Id="LicenseFile" Guid="*">
-        <File Id="LicenseFile" 
-              Source="LICENSE" 
-              Name="LICENSE.txt" 
-              KeyPath="yes" />
-      </Component>
-      
-      <Component Id="ReadmeFile" Guid="*">
-        <File Id="ReadmeFile" 
-              Source="README.md" 
-              Name="README.txt" 
-              KeyPath="yes" />
-      </Component>
-    </ComponentGroup>
+    msi_path = os.path.join('dist', bdist_msi_options['target_name'])
+    wixobj_files = [obj_dir + Path(f).stem + '.wixobj' for f in (wxs_path, fragment_path)]
+    subprocess.run([light, '-out', msi_path, *wixobj_files], cwd=ROOT, check=True)
+
+def create_advanced_msi():
+    """创建高级MSI安装包（使用WiX工具链，直接打包 PyInstaller 输出）"""
+    print("创建高级MSI安装包...")
     
-    <Component Id="DesktopShortcut" Directory="DesktopFolder" Guid="*">
-      <Shortcut Id="DesktopShortcut" 
-                Name="{APP_NAME}" 
-                Target="[INSTALLFOLDER]ChangoEditor.exe" 
-                WorkingDirectory="INSTALLFOLDER" />
-      <RemoveFolder Id="DesktopFolder" On="uninstall" />
-      <RegistryValue Root="HKCU" 
-                     Key="Software\\{APP_AUTHOR}\\{APP_NAME}" 
-                     Name="installed" 
-                     Type="integer" 
-                     Value="1" 
-                     KeyPath="yes" />
-    </Component>
+    output = find_pyinstaller_output()
+    if output is None:
+        print("❌ 未找到 PyInstaller 目录模式输出，请先运行: python build_exe.py")
+        return False
+    dist_dir, exe_path = output
     
-    <Component Id="StartMenuShortcut" Directory="ApplicationProgramsFolder" Guid="*">
-      <Shortcut Id="StartMenuShortcut" 
-                Name="{APP_NAME}" 
-                Target="[INSTALLFOLDER]ChangoEditor.exe" 
-                WorkingDirectory="INSTALLFOLDER" />
-      <RemoveFolder Id="ApplicationProgramsFolder" On="uninstall" />
-      <RegistryValue Root="HKCU" 
-                     Key="Software\\{APP_AUTHOR}\\{APP_NAME}" 
-                     Name="installed" 
-                     Type="integer" 
-                     Value="1" 
-                     KeyPath="yes" />
-    </Component>
+    # WiX源文件由模板生成
+    template = Path(ROOT, 'installer', 'chango_editor.wxs.tmpl').read_text(encoding='utf-8')
+    wxs_content = template.format_map({
+        'app_name': APP_NAME,
+        'app_version': APP_VERSION,
+        'app_author': APP_AUTHOR,
+        'app_description': APP_DESCRIPTION,
+        'upgrade_code': '{' + str(UPGRADE_CODE).upper() + '}',
+        'exe_source': exe_path,
+        'main_executable_guid': component_guid('MainExecutable'),
+        'license_file_guid': component_guid('LicenseFile'),
+        'readme_file_guid': component_guid('ReadmeFile'),
+        'desktop_shortcut_guid': component_guid('DesktopShortcut'),
+        'start_menu_shortcut_guid': component_guid('StartMenuShortcut'),
+    })
     
-  </Product>
-</Wix>'''
+    # 保存WiX源文件（内容未变化时不重写，保留原修改时间）
+    wxs_path = Path(ROOT, 'installer', 'chango_editor.wxs')
+    if wxs_path.exists() and wxs_path.read_text(encoding='utf-8') == wxs_content:
+        print("WiX源文件无变化: installer/chango_editor.wxs")
+    else:
+        wxs_path.write_text(wxs_content, encoding='utf-8')
+        print("WiX源文件已创建: installer/chango_editor.wxs")
     
-    # 保存WiX源文件
-    with open('installer/chango_editor.wxs', 'w', encoding='utf-8') as f:
-        f.write(wxs_content)
+    wix_tools = find_wix_tools()
+    if wix_tools is None:
+        print("要构建MSI，请使用WiX工具链:")
+        print("1. 安装 WiX Toolset 并将其 bin 目录加入 PATH")
+        print("2. 重新运行: python build_msi.py wix")
+        return False
     
-    print("WiX源文件已创建: installer/chango_editor.wxs")
-    print("要构建MSI，请使用WiX工具链:")
-    print("1. 安装 WiX Toolset")
-    print("2. 运行: candle installer/chango_editor.wxs")
-    print("3. 运行: light chango_editor.wixobj -out ChangoEditor-Setup.msi")
+    run_wix_toolchain(wix_tools, str(wxs_path), dist_dir / '_internal')
+    print(f"✅ MSI已生成: dist/{bdist_msi_options['target_name']}")
+    return True
 
 if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == "clean":
@@ -354,6 +435,10 @@ if __name__ == "__main__":
         print(f"构建 {APP_NAME} MSI安装包")
         print("=" * 50)
         
+        # 已有 PyInstaller 输出且安装了WiX时直接打包，无需 cx_Freeze 再分析一遍
+        if find_pyinstaller_output() and find_wix_tools():
+            sys.exit(0 if create_advanced_msi() else 1)
+        
         # 检查依赖
         try:
             import cx_Freeze
@@ -373,12 +458,15 @@ if __name__ == "__main__":
         print("安装包位置: dist/")
         
         # 显示构建结果
-        dist_files = os.listdir("dist") if os.path.exists("dist") else []
-        msi_files = [f for f in dist_files if f.endswith('.msi')]
+        # scandir 读取目录时已带有文件信息，无需再逐个 stat
+        msi_files = []
+        if (ROOT / "dist").exists():
+            with os.scandir(ROOT / "dist") as it:
+                msi_files = [(e.name, e.stat().st_size) for e in it
+                             if e.is_file() and e.name.endswith('.msi')]
         if msi_files:
-            for msi_file in msi_files:
-                size = os.path.getsize(f"dist/{msi_file}") / (1024*1024)
-                print(f"文件: {msi_file} ({size:.1f} MB)")
+            for msi_file, size in msi_files:
+                print(f"文件: {msi_file} ({size / MB:.1f} MB)")
         else:
             print("未找到MSI文件，请检查构建日志")
 
@@ -8,15 +8,18 @@ Chango Editor 快速发布脚本
 
 import os
 import sys
+import json
+import functools
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import shutil
 
-# 设置 UTF-8 编码输出
-if sys.platform == 'win32':
-    import io
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+# 设置 UTF-8 编码输出（原地切换编码，子进程也使用UTF-8模式）
+if sys.platform == 'win32' and sys.stdout.encoding.lower() != 'utf-8':
+    os.environ.setdefault('PYTHONUTF8', '1')
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+    sys.stderr.reconfigure(encoding='utf-8', errors='replace')
 
 # 从统一版本配置文件导入版本信息
 try:
@@ -24,6 +27,7 @@ try:
         __version__ as VERSION,
         RELEASE_TAG as TAG,
         RELEASE_TITLE,
+        APP_NAME,
         APP_DISPLAY_NAME
     )
     print(f"✅ 版本信息加载成功: {TAG}")
@@ -32,13 +36,40 @@ except ImportError:
     VERSION = "1.4.0"
     TAG = f"v{VERSION}"
     RELEASE_TITLE = f"Chango Editor v{VERSION} - 完整国际化支持"
+    APP_NAME = "ChangoEditor"
     APP_DISPLAY_NAME = "Chango Editor"
 
+# 项目根目录（脚本所在目录），构建命令都在此目录下运行
+ROOT = str(Path(__file__).resolve().parent)
+
 # 文件路径
-EXE_FILE = Path(f"dist/{APP_NAME}-v{VERSION}.exe")
+# build_exe.py 默认使用 onedir 模式，发布时以 --zip 构建并发布打包好的 zip；
+# PYINSTALLER_BUILD_ONEFILE=yes 时发布单文件 exe
+if os.environ.get('PYINSTALLER_BUILD_ONEFILE') == 'yes':
+    EXE_FILE = Path(f"dist/{APP_NAME}-v{VERSION}.exe")
+else:
+    EXE_FILE = Path(f"dist/{APP_NAME}-v{VERSION}.zip")
 MSI_FILE = Path(f"dist/ChangoEditor-Setup-v{VERSION}.msi")
 CHANGELOG_FILE = Path(f"CHANGELOG_v{VERSION}.md")
 
+# 安装包编译器及其默认安装位置（PATH 中找不到时查找）
+INSTALLER_TOOLS = {
+    "iscc": [
+        r"C:\Program Files (x86)\Inno Setup 6\ISCC.exe",
+        r"C:\Program Files\Inno Setup 6\ISCC.exe",
+    ],
+    "makensis": [
+        r"C:\Program Files (x86)\NSIS\makensis.exe",
+        r"C:\Program Files\NSIS\makensis.exe",
+    ],
+}
+
+# 文件大小换算单位
+MB = 1 << 20
+
+# 编译器查找结果缓存（工具名 → 路径），路径失效时重新查找
+TOOL_CACHE_FILE = Path("installer/.toolcache.json")
+
 def print_step(step, message):
     """打印步骤信息"""
     print(f"\n{'='*70}")
@@ -49,22 +80,27 @@ def run_command(cmd, description):
     """运行命令并显示结果"""
     print(f"\n🔧 {description}...")
     print(f"命令: {cmd}")
-    result = subprocess.run(
+    # 逐行转发子进程输出，不在内存中缓存；多个命令并行时用描述区分来源
+    process = subprocess.Popen(
         cmd, 
         shell=True, 
-        capture_output=True, 
+        cwd=ROOT,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
         text=True,
         encoding='utf-8',
-        errors='ignore'  # 忽略无法解码的字符
+        errors='ignore',  # 忽略无法解码的字符
+        bufsize=1
     )
+    for line in process.stdout:
+        sys.stdout.write(f"[{description}] {line}")
+    returncode = process.wait()
     
-    if result.returncode != 0:
-        print(f"❌ 失败: {result.stderr}")
+    if returncode != 0:
+        print(f"❌ {description}失败 (退出码 {returncode})")
         return False
     else:
-        print(f"✅ 成功")
-        if result.stdout:
-            print(result.stdout)
+        print(f"✅ {description}成功")
     return True
 
 def check_files():
@@ -77,9 +113,12 @@ def check_files():
         "CHANGELOG_v1.4.0.md": "更新日志"
     }
     
+    # 一次读取根目录，代替逐个文件 stat
+    present = {entry.name for entry in os.scandir(ROOT)}
+    
     all_exist = True
     for file, desc in files_to_check.items():
-        if Path(file).exists():
+        if file in present:
             print(f"  ✅ {desc}: {file}")
         else:
             print(f"  ❌ {desc}缺失: {file}")
@@ -91,11 +130,11 @@ def build_exe():
     """构建 EXE 文件"""
     print_step(2, "构建 EXE 文件")
     
-    if not run_command("python build_exe.py", "构建 EXE"):
+    if not run_command("python build_exe.py --zip", "构建 EXE"):
         return False
     
     if EXE_FILE.exists():
-        size_mb = EXE_FILE.stat().st_size / (1024 * 1024)
+        size_mb = EXE_FILE.stat().st_size / MB
         print(f"\n✅ EXE 文件已创建: {EXE_FILE}")
         print(f"   大小: {size_mb:.1f} MB")
         return True
@@ -103,15 +142,76 @@ def build_exe():
         print(f"\n❌ EXE 文件未找到: {EXE_FILE}")
         return False
 
-def build_msi():
-    """构建 MSI 安装包"""
-    print_step(3, "构建 MSI 安装包")
+@functools.lru_cache(maxsize=1)
+def _tool_cache():
+    """读取编译器查找结果缓存"""
+    try:
+        return json.loads(TOOL_CACHE_FILE.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+def find_tool(name):
+    """查找安装包编译器，先查缓存，再查 PATH 和默认安装位置"""
+    cache = _tool_cache()
+    cached = cache.get(name)
+    # 使用前重新确认缓存路径仍是文件；卸载或移动后丢弃这条缓存
+    if cached and os.path.isfile(cached):
+        return cached
+    stale = cache.pop(name, None) is not None
+    
+    found = shutil.which(name)
+    if not found:
+        found = next((c for c in INSTALLER_TOOLS[name] if os.path.isfile(c)), None)
+    
+    # 只缓存找到的路径，未安装的工具下次仍会重新查找
+    if found:
+        cache[name] = found
+    if found or stale:
+        try:
+            TOOL_CACHE_FILE.write_text(json.dumps(cache, indent=2), encoding='utf-8')
+        except OSError:
+            pass
+    return found
+
+def build_installers():
+    """构建 MSI、Inno Setup 和 NSIS 安装包
+
+    MSI 构建可能重建或清理 dist/ 和 build/，因此先单独完成；
+    之后 Inno Setup 和 NSIS 只读取 dist/、输出互不相同，用线程同时启动。
+    Inno Setup 和 NSIS 未安装时跳过；版本号通过 /D 从 version.py 传入两个脚本。
+    """
+    print_step(3, "构建安装包")
     
-    if not run_command("python build_msi.py", "构建 MSI"):
+    msi_ok = run_command("python build_msi.py", "构建 MSI")
+    
+    tasks = {}
+    
+    iscc = find_tool("iscc")
+    if iscc:
+        tasks["Inno Setup"] = (f'"{iscc}" /DAppVersion={VERSION} installer/chango_editor_setup.iss', "构建 Inno Setup 安装包")
+    else:
+        print("⏭️  未找到 Inno Setup (ISCC.exe)，跳过")
+    
+    makensis = find_tool("makensis")
+    if makensis:
+        tasks["NSIS"] = (f'"{makensis}" /DVERSION={VERSION} installer/chango_editor_nsis.nsi', "构建 NSIS 安装包")
+    else:
+        print("⏭️  未找到 NSIS (makensis.exe)，跳过")
+    
+    if tasks:
+        with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+            futures = {name: executor.submit(run_command, *args) for name, args in tasks.items()}
+            results = {name: future.result() for name, future in futures.items()}
+        
+        for name, ok in results.items():
+            if not ok:
+                print(f"⚠️  {name} 安装包构建失败")
+    
+    if not msi_ok:
         return False
     
     if MSI_FILE.exists():
-        size_mb = MSI_FILE.stat().st_size / (1024 * 1024)
+        size_mb = MSI_FILE.stat().st_size / MB
         print(f"\n✅ MSI 文件已创建: {MSI_FILE}")
         print(f"   大小: {size_mb:.1f} MB")
         return True
@@ -119,6 +219,18 @@ def build_msi():
         print(f"\n❌ MSI 文件未找到: {MSI_FILE}")
         return False
 
+def _fast_copy(src, dst):
+    """复制发布文件：与源文件在同一卷上时直接创建硬链接，否则完整复制"""
+    dst = Path(dst)
+    # 先删除旧文件，避免写穿上次创建的硬链接
+    if dst.exists():
+        dst.unlink()
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+        shutil.copystat(src, dst)
+
 def prepare_release_package():
     """准备发布包"""
     print_step(4, "准备发布包")
@@ -132,19 +244,19 @@ def prepare_release_package():
     
     if EXE_FILE.exists():
         dest = release_dir / EXE_FILE.name
-        shutil.copy2(EXE_FILE, dest)
+        _fast_copy(EXE_FILE, dest)
         print(f"  ✅ 复制: {EXE_FILE.name}")
         files_to_copy.append(dest)
     
     if MSI_FILE.exists():
         dest = release_dir / MSI_FILE.name
-        shutil.copy2(MSI_FILE, dest)
+        _fast_copy(MSI_FILE, dest)
         print(f"  ✅ 复制: {MSI_FILE.name}")
         files_to_copy.append(dest)
     
     if CHANGELOG_FILE.exists():
         dest = release_dir / CHANGELOG_FILE.name
-        shutil.copy2(CHANGELOG_FILE, dest)
+        _fast_copy(CHANGELOG_FILE, dest)
         print(f"  ✅ 复制: {CHANGELOG_FILE.name}")
     
     print(f"\n📦 发布包已准备在: {release_dir.absolute()}")
@@ -171,7 +283,7 @@ def show_github_instructions(files):
 """)
     
     for file in files:
-        size_mb = file.stat().st_size / (1024 * 1024)
+        size_mb = file.stat().st_size / MB
         print(f"   - {file.name} ({size_mb:.1f} MB)")
     
     print("""
@@ -212,6 +324,9 @@ def main():
 ╚═══════════════════════════════════════════════════════════════════╝
 """)
     
+    # 允许从任意目录运行发布脚本
+    os.chdir(ROOT)
+    
     try:
         # 检查文件
         if not check_files():
@@ -230,8 +345,8 @@ def main():
             print("\n❌ EXE 构建失败")
             return 1
         
-        # 构建 MSI
-        if not build_msi():
+        # 构建安装包
+        if not build_installers():
             print("\n❌ MSI 构建失败")
             return 1
         
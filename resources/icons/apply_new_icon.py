@@ -3,7 +3,8 @@ Quick script to apply new icon design
 """
 
 import shutil
-import os
+from pathlib import Path
+
 
 def apply_icon(version='v2'):
     """
@@ -12,20 +13,20 @@ def apply_icon(version='v2'):
     Args:
         version: v1, v2, or v3
     """
-    icon_dir = os.path.dirname(os.path.abspath(__file__))
+    icon_dir = Path(__file__).resolve().parent
     
     # Define file paths
-    old_png = os.path.join(icon_dir, 'chango_editor.png')
-    old_ico = os.path.join(icon_dir, 'chango_editor.ico')
+    old_png = icon_dir / 'chango_editor.png'
+    old_ico = icon_dir / 'chango_editor.ico'
     
-    new_png = os.path.join(icon_dir, f'chango_editor_{version}.png')
-    new_ico = os.path.join(icon_dir, f'chango_editor_{version}.ico')
+    new_png = icon_dir / f'chango_editor_{version}.png'
+    new_ico = icon_dir / f'chango_editor_{version}.ico'
     
-    backup_png = os.path.join(icon_dir, 'chango_editor_old.png')
-    backup_ico = os.path.join(icon_dir, 'chango_editor_old.ico')
+    backup_png = icon_dir / 'chango_editor_old.png'
+    backup_ico = icon_dir / 'chango_editor_old.ico'
     
     # Check if new icon exists
-    if not os.path.exists(new_png) or not os.path.exists(new_ico):
+    if not new_png.exists() or not new_ico.exists():
         print(f"Error: Icon version {version} not found!")
         print(f"Available versions: v1, v2, v3")
         return False
@@ -35,11 +36,11 @@ def apply_icon(version='v2'):
     print(f"{'='*60}\n")
     
     # Backup old icons
-    if os.path.exists(old_png):
+    if old_png.exists():
         shutil.copy2(old_png, backup_png)
         print(f"Backed up: chango_editor.png -> chango_editor_old.png")
     
-    if os.path.exists(old_ico):
+    if old_ico.exists():
         shutil.copy2(old_ico, backup_ico)
         print(f"Backed up: chango_editor.ico -> chango_editor_old.ico")
     
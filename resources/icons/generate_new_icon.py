@@ -4,22 +4,78 @@ Design: Highlight C and G letters with modern gradient colors
 """
 
 from PIL import Image, ImageDraw, ImageFont
+from concurrent.futures import ProcessPoolExecutor
 import os
 import sys
 
 # Set UTF-8 encoding for console output
 if sys.platform == 'win32':
-    import codecs
-    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
-    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+    sys.stderr.reconfigure(encoding='utf-8', errors='replace')
+
+# 图标目录（与本脚本同目录）
+ICON_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# ICO 文件包含的尺寸
+ICO_SIZES = [16, 32, 48, 64, 128, 256]
+
+def vertical_gradient(size, color_at):
+    """生成竖直渐变图像
+
+    只计算一列像素，再横向拉伸到整幅图像，避免逐行调用 draw.line。
+
+    Args:
+        size: 图像边长
+        color_at: 根据行位置比例 (0~1) 返回 RGBA 颜色的函数
+    """
+    column = Image.new('RGBA', (1, size))
+    column.putdata([color_at(i / size) for i in range(size)])
+    return column.resize((size, size), Image.Resampling.NEAREST)
+
+
+def rounded_mask(size, radius):
+    """圆角遮罩"""
+    mask = Image.new('L', (size, size), 0)
+    ImageDraw.Draw(mask).rounded_rectangle(
+        [(0, 0), (size, size)],
+        radius=radius,
+        fill=255
+    )
+    return mask
+
+
+def rounded_background(size, bg_color):
+    """纯色圆角矩形背景"""
+    img = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+    ImageDraw.Draw(img).rounded_rectangle(
+        [(0, 0), (size, size)],
+        radius=size // 8,
+        fill=bg_color
+    )
+    return img
+
+
+def draw_g_bar(draw, left, right, top, bar_bottom, arm_bottom, stroke, fill):
+    """绘制字母 G 的横线和竖线
+
+    两段合并为一个L形多边形，只需光栅化一次。
+
+    Args:
+        left, right: 横线左右边界（竖线贴在右端）
+        top, bar_bottom: 横线上下边界
+        arm_bottom: 竖线下端
+        stroke: 竖线宽度
+    """
+    draw.polygon(
+        [(left, top), (right, top), (right, arm_bottom),
+         (right - stroke, arm_bottom), (right - stroke, bar_bottom), (left, bar_bottom)],
+        fill=fill
+    )
+
 
 def create_chango_icon(size=512):
     """创建突出C和G字母的现代图标"""
     
-    # 创建画布，使用透明背景
-    img = Image.new('RGBA', (size, size), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
-    
     # 定义颜色方案 - 现代科技风格
     bg_color = (45, 55, 72, 255)  # 深蓝灰色背景
     gradient_start = (99, 102, 241, 255)  # 紫蓝色
@@ -27,23 +83,17 @@ def create_chango_icon(size=512):
     accent_color = (236, 72, 153, 255)  # 粉红色强调
     text_color = (255, 255, 255, 255)  # 白色文字
     
-    # 绘制圆角矩形背景
-    corner_radius = size // 8
-    draw.rounded_rectangle(
-        [(0, 0), (size, size)],
-        radius=corner_radius,
-        fill=bg_color
-    )
+    # 圆角矩形背景（透明画布）
+    img = rounded_background(size, bg_color)
+    draw = ImageDraw.Draw(img)
     
-    # 绘制渐变背景效果
-    for i in range(size):
-        ratio = i / size
-        r = int(gradient_start[0] + (gradient_end[0] - gradient_start[0]) * ratio)
-        g = int(gradient_start[1] + (gradient_end[1] - gradient_start[1]) * ratio)
-        b = int(gradient_start[2] + (gradient_end[2] - gradient_start[2]) * ratio)
-        alpha = int(180 * (1 - ratio * 0.7))  # 渐变透明度
-        
-        draw.line([(0, i), (size, i)], fill=(r, g, b, alpha), width=1)
+    # 绘制渐变背景效果（直接覆盖像素，与逐行 draw.line 的效果相同）
+    img.paste(vertical_gradient(size, lambda ratio: (
+        int(gradient_start[0] + (gradient_end[0] - gradient_start[0]) * ratio),
+        int(gradient_start[1] + (gradient_end[1] - gradient_start[1]) * ratio),
+        int(gradient_start[2] + (gradient_end[2] - gradient_start[2]) * ratio),
+        int(180 * (1 - ratio * 0.7))  # 渐变透明度
+    )))
     
     # 绘制装饰圆圈
     circle_size = size // 6
@@ -85,18 +135,13 @@ def create_chango_icon(size=512):
         width=stroke_width
     )
     
-    # G 的横线
+    # G 的横线和竖线
     horizontal_line_y = center_y
-    draw.rectangle(
-        [(g_x - stroke_width // 2, horizontal_line_y - stroke_width // 2),
-         (g_x + g_radius, horizontal_line_y + stroke_width // 2)],
-        fill=text_color
-    )
-    
-    # G 的竖线
-    draw.rectangle(
-        [(g_x + g_radius - stroke_width, horizontal_line_y - stroke_width // 2),
-         (g_x + g_radius, center_y + stroke_width)],
+    draw_g_bar(
+        draw,
+        g_x - stroke_width // 2, g_x + g_radius,
+        horizontal_line_y - stroke_width // 2, horizontal_line_y + stroke_width // 2,
+        center_y + stroke_width, stroke_width,
         fill=text_color
     )
     
@@ -123,22 +168,16 @@ def create_chango_icon(size=512):
 def create_alternative_icon(size=512):
     """创建另一个设计方案 - 交叉的C和G"""
     
-    img = Image.new('RGBA', (size, size), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
-    
     # 定义颜色 - 编辑器风格
     bg_color = (30, 41, 59, 255)  # 深色背景
     c_color = (34, 211, 238, 255)  # 青色 C
     g_color = (251, 191, 36, 255)  # 橙色 G
     border_color = (148, 163, 184, 255)  # 边框
     
-    # 绘制圆角矩形背景
+    # 圆角矩形背景
     corner_radius = size // 8
-    draw.rounded_rectangle(
-        [(0, 0), (size, size)],
-        radius=corner_radius,
-        fill=bg_color
-    )
+    img = rounded_background(size, bg_color)
+    draw = ImageDraw.Draw(img)
     
     # 绘制边框
     draw.rounded_rectangle(
@@ -177,15 +216,11 @@ def create_alternative_icon(size=512):
     g_center_x = center_x + 30
     horizontal_y = center_y
     
-    draw.rectangle(
-        [(g_center_x - stroke_width // 2, horizontal_y - stroke_width // 2),
-         (g_center_x + letter_radius, horizontal_y + stroke_width // 2)],
-        fill=g_color
-    )
-    
-    draw.rectangle(
-        [(g_center_x + letter_radius - stroke_width, horizontal_y - stroke_width // 2),
-         (g_center_x + letter_radius, horizontal_y + letter_radius // 2)],
+    draw_g_bar(
+        draw,
+        g_center_x - stroke_width // 2, g_center_x + letter_radius,
+        horizontal_y - stroke_width // 2, horizontal_y + stroke_width // 2,
+        horizontal_y + letter_radius // 2, stroke_width,
         fill=g_color
     )
     
@@ -200,27 +235,16 @@ def create_alternative_icon(size=512):
 def create_minimalist_icon(size=512):
     """创建极简风格图标 - CG字母组合"""
     
-    img = Image.new('RGBA', (size, size), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
-    
     # 渐变背景 - 从深蓝到深紫
-    for i in range(size):
-        ratio = i / size
-        r = int(59 + (88 - 59) * ratio)
-        g = int(130 + (28 - 130) * ratio)
-        b = int(246 + (135 - 246) * ratio)
-        draw.line([(0, i), (size, i)], fill=(r, g, b, 255), width=1)
+    img = vertical_gradient(size, lambda ratio: (
+        int(59 + (88 - 59) * ratio),
+        int(130 + (28 - 130) * ratio),
+        int(246 + (135 - 246) * ratio),
+        255
+    ))
     
     # 圆角遮罩
-    corner_radius = size // 8
-    mask = Image.new('L', (size, size), 0)
-    mask_draw = ImageDraw.Draw(mask)
-    mask_draw.rounded_rectangle(
-        [(0, 0), (size, size)],
-        radius=corner_radius,
-        fill=255
-    )
-    img.putalpha(mask)
+    img.putalpha(rounded_mask(size, size // 8))
     
     draw = ImageDraw.Draw(img)
     
@@ -252,15 +276,11 @@ def create_minimalist_icon(size=512):
     
     # G 的特征线
     h_line_y = center_y
-    draw.rectangle(
-        [(g_x - stroke // 2, h_line_y - stroke // 2),
-         (g_x + letter_size // 2, h_line_y + stroke // 2)],
-        fill=(255, 255, 255, 255)
-    )
-    
-    draw.rectangle(
-        [(g_x + letter_size // 2 - stroke, h_line_y),
-         (g_x + letter_size // 2, h_line_y + letter_size // 3)],
+    draw_g_bar(
+        draw,
+        g_x - stroke // 2, g_x + letter_size // 2,
+        h_line_y - stroke // 2, h_line_y + stroke // 2,
+        h_line_y + letter_size // 3, stroke,
         fill=(255, 255, 255, 255)
     )
     
@@ -278,12 +298,36 @@ def create_minimalist_icon(size=512):
     return img
 
 
+def build_design(design):
+    """生成一种设计方案的 PNG 和多尺寸 ICO（在独立进程中运行）"""
+    design_name, create_func = design
+    
+    # 生成主图标 (512x512)
+    main_icon = create_func(512)
+    png_path = os.path.join(ICON_DIR, f'{design_name}.png')
+    main_icon.save(png_path, 'PNG')
+    
+    # Generate ICO file with multiple sizes
+    # 从大到小逐级缩放，每一级都基于上一级结果，计算量更小且小尺寸更少锯齿
+    ico_path = os.path.join(ICON_DIR, f'{design_name}.ico')
+    icon_images = []
+    current = main_icon
+    for size in sorted(ICO_SIZES, reverse=True):
+        current = current.resize((size, size), Image.Resampling.LANCZOS)
+        icon_images.append(current)
+    
+    icon_images[0].save(
+        ico_path,
+        format='ICO',
+        sizes=[(s, s) for s in ICO_SIZES],
+        append_images=icon_images[1:]
+    )
+    return design_name
+
+
 def main():
     """生成所有尺寸的图标"""
     
-    # 获取图标目录
-    icon_dir = os.path.dirname(os.path.abspath(__file__))
-    
     # 生成三种设计方案
     designs = {
         'chango_editor_v1': create_chango_icon,
@@ -291,31 +335,12 @@ def main():
         'chango_editor_v3': create_minimalist_icon
     }
     
-    for design_name, create_func in designs.items():
-        print(f"\nGenerating design: {design_name}")
-        
-        # 生成主图标 (512x512)
-        main_icon = create_func(512)
-        png_path = os.path.join(icon_dir, f'{design_name}.png')
-        main_icon.save(png_path, 'PNG')
-        print(f"  Saved: {design_name}.png (512x512)")
-        
-        # Generate ICO file with multiple sizes
-        ico_path = os.path.join(icon_dir, f'{design_name}.ico')
-        sizes = [16, 32, 48, 64, 128, 256]
-        icon_images = []
-        
-        for size in sizes:
-            resized = main_icon.resize((size, size), Image.Resampling.LANCZOS)
-            icon_images.append(resized)
-        
-        icon_images[0].save(
-            ico_path,
-            format='ICO',
-            sizes=[(s, s) for s in sizes],
-            append_images=icon_images[1:]
-        )
-        print(f"  Saved: {design_name}.ico (multi-size)")
+    # 三种设计互不依赖，分别在独立进程中生成
+    with ProcessPoolExecutor(max_workers=len(designs)) as executor:
+        for design_name in executor.map(build_design, designs.items()):
+            print(f"\nGenerated design: {design_name}")
+            print(f"  Saved: {design_name}.png (512x512)")
+            print(f"  Saved: {design_name}.ico (multi-size)")
     
     print("\n" + "="*60)
     print("Icon generation completed!")
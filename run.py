@@ -6,15 +6,9 @@ Chango Editor 启动脚本
     python run.py [文件路径]
 """
 
-import sys
-import os
+import runpy
 
-# 添加src目录到Python路径
-project_root = os.path.dirname(os.path.abspath(__file__))
-src_path = os.path.join(project_root, 'src')
-sys.path.insert(0, src_path)
-
-# 导入并运行主程序
+# 以 __main__ 方式运行 src.main（项目根目录已由解释器加入 sys.path，
+# src 目录由 src/main.py 自行加入，这里无需再修改 sys.path）
 if __name__ == "__main__":
-    from src.main import main
-    main()
+    runpy.run_module("src.main", run_name="__main__", alter_sys=True)
@@ -10,17 +10,192 @@
 """
 
 import os
+import re
+import functools
+from collections import OrderedDict
 from PyQt6.QtWidgets import (
     QPlainTextEdit, QWidget, QHBoxLayout, QTextEdit,
     QMessageBox, QFileDialog
 )
-from PyQt6.QtCore import Qt, pyqtSignal, QRect, QSize
+from PyQt6.QtCore import Qt, pyqtSignal, QRect, QSize, QPointF, QTimer
 from PyQt6.QtGui import (
     QColor, QPainter, QTextFormat, QFont, QFontMetrics,
-    QTextCursor, QTextCharFormat, QPaintEvent, QTextDocument
+    QTextCursor, QTextCharFormat, QPaintEvent, QTextDocument,
+    QStaticText, QTransform
 )
 
 from utils.syntax import SyntaxHighlighter
+from utils.charset_sniff import read_text_file
+
+
+# 扩展名 -> 语言
+LANGUAGE_MAP = {
+    # Python
+    '.py': 'python',
+    '.pyw': 'python',
+    '.pyx': 'python',
+    
+    # JavaScript/TypeScript
+    '.js': 'javascript',
+    '.jsx': 'javascript',
+    '.ts': 'typescript',
+    '.tsx': 'typescript',
+    
+    # Web
+    '.html': 'html',
+    '.htm': 'html',
+    '.xhtml': 'html',
+    '.css': 'css',
+    '.scss': 'css',
+    '.sass': 'css',
+    '.less': 'css',
+    
+    # C/C++
+    '.c': 'c',
+    '.h': 'c',
+    '.cpp': 'cpp',
+    '.cxx': 'cpp',
+    '.cc': 'cpp',
+    '.hpp': 'cpp',
+    '.hxx': 'cpp',
+    
+    # C#
+    '.cs': 'csharp',
+    
+    # Java
+    '.java': 'java',
+    
+    # Other languages
+    '.php': 'php',
+    '.rb': 'ruby',
+    '.go': 'go',
+    '.rs': 'rust',
+    '.swift': 'swift',
+    '.kt': 'kotlin',
+    '.scala': 'scala',
+    '.r': 'r',
+    '.m': 'matlab',
+    '.lua': 'lua',
+    '.perl': 'perl',
+    '.pl': 'perl',
+    
+    # Shell scripts
+    '.sh': 'bash',
+    '.bash': 'bash',
+    '.zsh': 'bash',
+    '.fish': 'bash',
+    '.ps1': 'powershell',
+    '.bat': 'batch',
+    '.cmd': 'batch',
+    
+    # Data formats
+    '.sql': 'sql',
+    '.xml': 'xml',
+    '.json': 'json',
+    '.yaml': 'yaml',
+    '.yml': 'yaml',
+    '.toml': 'toml',
+    '.ini': 'ini',
+    '.cfg': 'ini',
+    '.conf': 'ini',
+    
+    # Documentation
+    '.md': 'markdown',
+    '.markdown': 'markdown',
+    '.rst': 'rst',
+    '.txt': 'text',
+    
+    # Misc
+    '.dockerfile': 'dockerfile',
+}
+
+# 特殊文件名（无扩展名或以点开头）-> 语言，文件名为小写
+FILENAME_LANGUAGE_MAP = {
+    'dockerfile': 'dockerfile',
+    'makefile': 'makefile',
+    'gnumakefile': 'makefile',
+    '.gitignore': 'text',
+    '.gitattributes': 'text',
+    '.editorconfig': 'ini',
+}
+
+
+# 编辑器样式表模板及主题缺少对应颜色时的默认值（默认暗色主题）
+EDITOR_STYLE_TEMPLATE = """
+QPlainTextEdit {{
+    background-color: {background};
+    color: {foreground};
+    border: none;
+    selection-background-color: {selection};
+}}
+"""
+DEFAULT_EDITOR_COLORS = {
+    'background': '#1e1e1e',
+    'foreground': '#d4d4d4',
+    'selection': '#264f78',
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _editor_font():
+    """编辑器默认等宽字体（字体匹配只在第一次创建编辑器时进行）"""
+    font = QFont("Consolas", 11)
+    if not font.exactMatch():
+        font = QFont("Courier New", 11)
+    font.setFixedPitch(True)
+    return font
+
+
+@functools.lru_cache(maxsize=128)
+def _compile_pattern(text, flags, regex=True, whole_words=False):
+    """编译查找用的正则表达式（反复查找同一内容时直接复用）
+    
+    Args:
+        text: 查找内容
+        flags: re 标志
+        regex: 为 False 时按普通文本转义
+        whole_words: 普通文本是否要求全词匹配
+    
+    Raises:
+        re.error: 正则表达式无效
+    """
+    if not regex:
+        text = re.escape(text)
+        if whole_words:
+            text = r'\b' + text + r'\b'
+    return re.compile(text, flags)
+
+
+def _find_flags(case_sensitive=False, whole_words=False, forward=True):
+    """生成 QTextDocument.find 使用的查找标志"""
+    flags = QTextDocument.FindFlag(0)
+    if not forward:
+        flags |= QTextDocument.FindFlag.FindBackward
+    if case_sensitive:
+        flags |= QTextDocument.FindFlag.FindCaseSensitively
+    if whole_words:
+        flags |= QTextDocument.FindFlag.FindWholeWords
+    return flags
+
+
+def _utf16_spans(text, matches):
+    """把正则匹配的字符下标转换为 QTextDocument 的位置
+    
+    QTextDocument 按 UTF-16 编码单元计数，文本含 BMP 以外的字符（如 emoji）时
+    两者不一致。
+    """
+    if text.isascii() or max(text) <= '\uffff':
+        return [match.span() for match in matches]
+    
+    spans = []
+    last_index = last_pos = 0
+    for match in matches:
+        start, end = match.span()
+        start_pos = last_pos + len(text[last_index:start].encode('utf-16-le')) // 2
+        end_pos = start_pos + len(text[start:end].encode('utf-16-le')) // 2
+        spans.append((start_pos, end_pos))
+        last_index, last_pos = end, end_pos
+    return spans
 
 
 class LineNumberArea(QWidget):
@@ -40,10 +215,20 @@ class LineNumberArea(QWidget):
 class TextEditor(QPlainTextEdit):
     """文本编辑器组件"""
     
+    # 行号静态文本缓存的最大条目数（按最近使用淘汰，覆盖屏幕附近的行即可）
+    STATIC_NUMBER_CACHE_SIZE = 2000
+    
+    # 光标移动后刷新当前行高亮和位置信号的间隔（毫秒），约一帧
+    CURSOR_UPDATE_INTERVAL = 16
+    
+    # 超过该字符数的文件默认关闭语法高亮（QSyntaxHighlighter 处理大文件非常慢）
+    SYNTAX_HIGHLIGHT_MAX_CHARS = 512 * 1024
+    
     # 信号定义
     file_path_changed = pyqtSignal(str)      # 文件路径改变
     content_saved = pyqtSignal()             # 内容已保存
     cursor_position_changed = pyqtSignal(int, int)  # 光标位置改变
+    large_file_mode_changed = pyqtSignal(bool)      # 大文件模式（关闭语法高亮）切换
     
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -51,6 +236,23 @@ class TextEditor(QPlainTextEdit):
         # 文件相关属性
         self.file_path = None
         self.file_encoding = 'utf-8'
+        self.large_file_mode = False
+        
+        # 行号区域宽度缓存（仅在行数位数或字体变化时重新计算）
+        self._digit_advance = 0
+        self._lna_digits = -1
+        self._lna_width = 0
+        self._last_ln_width = -1
+        
+        # 最近一次设置的样式表
+        self._last_style = None
+        
+        # 主题管理器及查找时所在的顶层窗口
+        self._theme_manager = None
+        self._theme_window = None
+        
+        # 行号 -> 已排版的 QStaticText，绘制时无需重新排版（LRU）
+        self._static_numbers = OrderedDict()
         
         # 创建行号区域
         self.line_number_area = LineNumberArea(self)
@@ -58,8 +260,14 @@ class TextEditor(QPlainTextEdit):
         # 连接信号
         self.blockCountChanged.connect(self.update_line_number_area_width)
         self.updateRequest.connect(self.update_line_number_area)
-        self.cursorPositionChanged.connect(self.highlight_current_line)
-        self.cursorPositionChanged.connect(self._on_cursor_position_changed)
+        self.cursorPositionChanged.connect(self._schedule_cursor_update)
+        
+        # 连续移动光标时（如按住方向键）合并为每帧一次更新
+        self._cursor_update_timer = QTimer(self)
+        self._cursor_update_timer.setSingleShot(True)
+        self._cursor_update_timer.setInterval(self.CURSOR_UPDATE_INTERVAL)
+        self._cursor_update_timer.timeout.connect(self._do_cursor_update)
+        self._last_cursor_position = None
         
         # 初始化设置
         self._init_editor()
@@ -72,16 +280,11 @@ class TextEditor(QPlainTextEdit):
     
     def _init_editor(self):
         """初始化编辑器设置"""
-        # 设置字体
-        font = QFont("Consolas", 11)
-        if not font.exactMatch():
-            font = QFont("Courier New", 11)
-        font.setFixedPitch(True)
-        self.setFont(font)
+        # 设置字体（复制一份，避免修改共享的字体对象）
+        self.setFont(QFont(_editor_font()))
         
         # 设置制表符宽度（4个空格）
-        font_metrics = QFontMetrics(font)
-        tab_width = 4 * font_metrics.horizontalAdvance(' ')
+        tab_width = 4 * self.fontMetrics().horizontalAdvance(' ')
         self.setTabStopDistance(tab_width)
         
         # 设置行号区域宽度
@@ -90,26 +293,16 @@ class TextEditor(QPlainTextEdit):
         # 禁用编辑器的拖拽功能，让TabWidget处理文件拖拽
         self.setAcceptDrops(False)
         
-        # 应用主题样式
-        self._apply_theme_style()
-        
-        # 高亮当前行
-        self.highlight_current_line()
-        
-        # 设置编辑器样式
-        self._apply_editor_style()
-    
-    def _apply_editor_style(self):
-        """应用编辑器样式"""
-        style = """
-        QPlainTextEdit {
-            background-color: #1e1e1e;
-            color: #d4d4d4;
-            border: none;
-            selection-background-color: #264f78;
-        }
-        """
-        self.setStyleSheet(style)
+        # 先使用默认颜色，主题样式推迟到编辑器第一次显示时再应用
+        self._refresh_theme_colors({})
+        self._theme_pending = True
+    
+    def _set_editor_style(self, colors):
+        """按主题颜色设置编辑器样式表（与当前样式相同时跳过，避免 Qt 重新解析）"""
+        style = EDITOR_STYLE_TEMPLATE.format_map({**DEFAULT_EDITOR_COLORS, **colors})
+        if style != self._last_style:
+            self.setStyleSheet(style)
+            self._last_style = style
     
     def _setup_syntax_highlighting(self):
         """设置语法高亮"""
@@ -124,112 +317,65 @@ class TextEditor(QPlainTextEdit):
         if not self.file_path:
             return
         
-        _, ext = os.path.splitext(self.file_path)
-        ext = ext.lower()
-        
-        # 扩展的语言映射
-        language_map = {
-            # Python
-            '.py': 'python',
-            '.pyw': 'python',
-            '.pyx': 'python',
-            
-            # JavaScript/TypeScript
-            '.js': 'javascript',
-            '.jsx': 'javascript',
-            '.ts': 'typescript',
-            '.tsx': 'typescript',
-            
-            # Web
-            '.html': 'html',
-            '.htm': 'html',
-            '.xhtml': 'html',
-            '.css': 'css',
-            '.scss': 'css',
-            '.sass': 'css',
-            '.less': 'css',
-            
-            # C/C++
-            '.c': 'c',
-            '.h': 'c',
-            '.cpp': 'cpp',
-            '.cxx': 'cpp',
-            '.cc': 'cpp',
-            '.hpp': 'cpp',
-            '.hxx': 'cpp',
-            
-            # C#
-            '.cs': 'csharp',
-            
-            # Java
-            '.java': 'java',
-            
-            # Other languages
-            '.php': 'php',
-            '.rb': 'ruby',
-            '.go': 'go',
-            '.rs': 'rust',
-            '.swift': 'swift',
-            '.kt': 'kotlin',
-            '.scala': 'scala',
-            '.r': 'r',
-            '.m': 'matlab',
-            '.lua': 'lua',
-            '.perl': 'perl',
-            '.pl': 'perl',
-            
-            # Shell scripts
-            '.sh': 'bash',
-            '.bash': 'bash',
-            '.zsh': 'bash',
-            '.fish': 'bash',
-            '.ps1': 'powershell',
-            '.bat': 'batch',
-            '.cmd': 'batch',
-            
-            # Data formats
-            '.sql': 'sql',
-            '.xml': 'xml',
-            '.json': 'json',
-            '.yaml': 'yaml',
-            '.yml': 'yaml',
-            '.toml': 'toml',
-            '.ini': 'ini',
-            '.cfg': 'ini',
-            '.conf': 'ini',
-            
-            # Documentation
-            '.md': 'markdown',
-            '.markdown': 'markdown',
-            '.rst': 'rst',
-            '.txt': 'text',
-            
-            # Misc
-            '.dockerfile': 'dockerfile',
-            '.gitignore': 'text',
-            '.gitattributes': 'text',
-            '.editorconfig': 'ini',
-        }
-        
-        language = language_map.get(ext, 'text')
+        # 先按完整文件名匹配，再按扩展名匹配
+        file_name = os.path.basename(self.file_path).lower()
+        language = FILENAME_LANGUAGE_MAP.get(file_name)
+        if language is None:
+            language = LANGUAGE_MAP.get(os.path.splitext(file_name)[1], 'text')
         if self.syntax_highlighter:
             self.syntax_highlighter.set_language(language)
             print(f"设置语法高亮语言: {language}")
     
+    def set_content(self, content):
+        """设置文件内容，超大文件自动关闭语法高亮"""
+        large_file = len(content) > self.SYNTAX_HIGHLIGHT_MAX_CHARS
+        self._static_numbers.clear()
+        
+        # 高亮器先与文档解除关联再设置内容，避免对整篇大文件做一次高亮
+        if large_file and not self.large_file_mode:
+            self.syntax_highlighter.setDocument(None)
+        self.setPlainText(content)
+        if not large_file and self.large_file_mode:
+            self.syntax_highlighter.setDocument(self.document())
+        
+        if large_file != self.large_file_mode:
+            self.large_file_mode = large_file
+            self.large_file_mode_changed.emit(large_file)
+            if large_file:
+                print(f"大文件 ({len(content)} 字符)，已关闭语法高亮")
+    
+    def force_enable_highlighting(self):
+        """为大文件强制启用语法高亮（供用户手动开启）"""
+        if not self.large_file_mode:
+            return
+        
+        self.large_file_mode = False
+        # 此时高亮器尚未关联文档，设置语言不会触发重新高亮，关联文档时只高亮一次
+        self._detect_and_set_language()
+        self.syntax_highlighter.setDocument(self.document())
+        self.large_file_mode_changed.emit(False)
+    
+    def setFont(self, font):
+        """设置字体，同时刷新依赖字体度量的缓存"""
+        super().setFont(font)
+        self._digit_advance = self.fontMetrics().horizontalAdvance('9')
+        self._lna_digits = -1
+        self._static_numbers.clear()
+    
     def line_number_area_width(self):
         """计算行号区域宽度"""
-        digits = 1
-        max_num = max(1, self.blockCount())
-        while max_num >= 10:
-            max_num //= 10
-            digits += 1
-        
-        space = 3 + self.fontMetrics().horizontalAdvance('9') * digits
-        return space
+        digits = len(str(max(1, self.blockCount())))
+        if digits != self._lna_digits:
+            self._lna_digits = digits
+            self._lna_width = 3 + self._digit_advance * digits
+        return self._lna_width
     
     def update_line_number_area_width(self, _):
-        """更新行号区域宽度"""
-        self.setViewportMargins(self.line_number_area_width(), 0, 0, 0)
+        """更新行号区域宽度（宽度未变化时不重设边距，避免重新布局）"""
+        width = self.line_number_area_width()
+        if width != self._last_ln_width:
+            self._last_ln_width = width
+            self.setViewportMargins(width, 0, 0, 0)
     
     def update_line_number_area(self, rect, dy):
         """更新行号区域"""
@@ -243,6 +389,21 @@ class TextEditor(QPlainTextEdit):
         if rect.contains(self.viewport().rect()):
             self.update_line_number_area_width(0)
     
+    def _static_number(self, number):
+        """获取行号对应的 QStaticText（首次使用时排版并缓存）"""
+        static_text = self._static_numbers.get(number)
+        if static_text is not None:
+            self._static_numbers.move_to_end(number)
+            return static_text
+        
+        static_text = QStaticText(str(number))
+        static_text.setTextFormat(Qt.TextFormat.PlainText)
+        static_text.prepare(QTransform(), self.font())
+        self._static_numbers[number] = static_text
+        if len(self._static_numbers) > self.STATIC_NUMBER_CACHE_SIZE:
+            self._static_numbers.popitem(last=False)
+        return static_text
+    
     def resizeEvent(self, event):
         """窗口大小改变事件"""
         super().resizeEvent(event)
@@ -256,25 +417,9 @@ class TextEditor(QPlainTextEdit):
         """绘制行号区域"""
         painter = QPainter(self.line_number_area)
         
-        # 获取主题颜色
-        bg_color = QColor(60, 60, 60)  # 默认背景色
-        fg_color = QColor(150, 150, 150)  # 默认前景色
-        
-        try:
-            main_window = self.parent()
-            while main_window and not hasattr(main_window, 'theme_manager'):
-                main_window = main_window.parent()
-            
-            if main_window and hasattr(main_window, 'theme_manager'):
-                theme = main_window.theme_manager.get_current_theme()
-                colors = theme.get("colors", {})
-                
-                bg_color = QColor(colors.get('line_number_background', '#3c3c3c'))
-                fg_color = QColor(colors.get('line_number_foreground', '#969696'))
-        except Exception as e:
-            print(f"获取行号主题颜色失败: {e}")
-        
-        painter.fillRect(event.rect(), bg_color)
+        # 主题颜色在应用主题时已缓存
+        rect = event.rect()
+        painter.fillRect(rect, self._ln_bg_color)
         
         block = self.firstVisibleBlock()
         block_number = block.blockNumber()
@@ -282,15 +427,19 @@ class TextEditor(QPlainTextEdit):
         bottom = top + int(self.blockBoundingRect(block).height())
         
         # 设置行号颜色
-        painter.setPen(fg_color)
-        
-        while block.isValid() and top <= event.rect().bottom():
-            if block.isVisible() and bottom >= event.rect().top():
-                number = str(block_number + 1)
-                painter.drawText(
-                    0, top, self.line_number_area.width() - 3, 
-                    self.fontMetrics().height(),
-                    Qt.AlignmentFlag.AlignRight, number
+        painter.setPen(self._ln_fg_color)
+        
+        rect_top = rect.top()
+        rect_bottom = rect.bottom()
+        number_width = self.line_number_area.width() - 3
+        
+        while block.isValid() and top <= rect_bottom:
+            if block.isVisible() and bottom >= rect_top:
+                # 右对齐绘制已排版的行号
+                static_text = self._static_number(block_number + 1)
+                painter.drawStaticText(
+                    QPointF(number_width - static_text.size().width(), top),
+                    static_text
                 )
             
             block = block.next()
@@ -300,39 +449,36 @@ class TextEditor(QPlainTextEdit):
     
     def highlight_current_line(self):
         """高亮当前行"""
-        extra_selections = []
-        
-        if not self.isReadOnly():
-            selection = QTextEdit.ExtraSelection()
-            
-            # 获取主题颜色
-            line_color = QColor(40, 40, 40)  # 默认颜色
-            
-            try:
-                main_window = self.parent()
-                while main_window and not hasattr(main_window, 'theme_manager'):
-                    main_window = main_window.parent()
-                
-                if main_window and hasattr(main_window, 'theme_manager'):
-                    theme = main_window.theme_manager.get_current_theme()
-                    colors = theme.get("colors", {})
-                    line_color = QColor(colors.get('line_highlight', '#2a2a2a'))
-            except Exception as e:
-                print(f"获取当前行高亮颜色失败: {e}")
-            
-            selection.format.setBackground(line_color)
-            selection.format.setProperty(QTextFormat.Property.FullWidthSelection, True)
-            selection.cursor = self.textCursor()
-            selection.cursor.clearSelection()
-            extra_selections.append(selection)
+        if self.isReadOnly():
+            self.setExtraSelections([])
+            return
         
-        self.setExtraSelections(extra_selections)
+        # 复用主题更新时创建的选区，只需更新光标
+        selection = self._current_line_selection
+        selection.cursor = self.textCursor()
+        selection.cursor.clearSelection()
+        self.setExtraSelections([selection])
+    
+    def _schedule_cursor_update(self):
+        """光标位置改变时安排一次更新（已安排时不重复启动）"""
+        if not self._cursor_update_timer.isActive():
+            self._cursor_update_timer.start()
+    
+    def _do_cursor_update(self):
+        """刷新当前行高亮并发射光标位置信号"""
+        self.highlight_current_line()
+        self._on_cursor_position_changed()
     
     def _on_cursor_position_changed(self):
         """光标位置改变事件"""
         cursor = self.textCursor()
         line = cursor.blockNumber() + 1
         column = cursor.columnNumber() + 1
+        
+        # 仅选区变化而行列未变时不重复发射
+        if (line, column) == self._last_cursor_position:
+            return
+        self._last_cursor_position = (line, column)
         self.cursor_position_changed.emit(line, column)
     
     def set_file_path(self, file_path):
@@ -350,25 +496,14 @@ class TextEditor(QPlainTextEdit):
     def load_file(self, file_path):
         """加载文件"""
         try:
-            # 尝试UTF-8编码
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            self.file_encoding = 'utf-8'
-        except UnicodeDecodeError:
-            try:
-                # 尝试GBK编码
-                with open(file_path, 'r', encoding='gbk') as f:
-                    content = f.read()
-                self.file_encoding = 'gbk'
-            except Exception as e:
-                print(f"无法读取文件 {file_path}: {e}")
-                return False
+            # 按BOM、UTF-8、本地编码的顺序识别编码
+            content, self.file_encoding = read_text_file(file_path)
         except Exception as e:
             print(f"无法读取文件 {file_path}: {e}")
             return False
         
         # 设置内容
-        self.setPlainText(content)
+        self.set_content(content)
         self.set_file_path(file_path)
         
         # 标记为未修改
@@ -458,14 +593,13 @@ class TextEditor(QPlainTextEdit):
     
     def goto_line(self, line_number):
         """跳转到指定行"""
-        if line_number < 1:
-            line_number = 1
+        # 超出范围时跳到第一行或最后一行
+        line_number = max(1, min(line_number, self.blockCount()))
         
+        # 直接按行号定位文本块，无需逐行移动光标
+        block = self.document().findBlockByNumber(line_number - 1)
         cursor = self.textCursor()
-        cursor.movePosition(QTextCursor.MoveOperation.Start)
-        
-        for _ in range(line_number - 1):
-            cursor.movePosition(QTextCursor.MoveOperation.Down)
+        cursor.setPosition(block.position())
         
         self.setTextCursor(cursor)
         self.ensureCursorVisible()
@@ -476,23 +610,16 @@ class TextEditor(QPlainTextEdit):
             return False
         
         # 设置查找标志
-        flags = QTextDocument.FindFlag(0)
-        if not forward:
-            flags |= QTextDocument.FindFlag.FindBackward
-        if case_sensitive:
-            flags |= QTextDocument.FindFlag.FindCaseSensitively
-        if whole_words:
-            flags |= QTextDocument.FindFlag.FindWholeWords
+        flags = _find_flags(case_sensitive, whole_words, forward)
         
         cursor = self.textCursor()
         
         if regex:
             # 正则表达式查找
-            import re
             pattern_flags = 0 if case_sensitive else re.IGNORECASE
             
             try:
-                pattern = re.compile(text, pattern_flags)
+                pattern = _compile_pattern(text, pattern_flags)
             except re.error as e:
                 print(f"正则表达式错误: {e}")
                 return False
@@ -538,10 +665,9 @@ class TextEditor(QPlainTextEdit):
         
         # 检查选中的文本是否匹配查找条件
         if regex:
-            import re
             pattern_flags = 0 if case_sensitive else re.IGNORECASE
             try:
-                pattern = re.compile(find_text, pattern_flags)
+                pattern = _compile_pattern(find_text, pattern_flags)
                 if pattern.fullmatch(selected_text):
                     cursor.insertText(replace_text)
                     return True
@@ -556,10 +682,9 @@ class TextEditor(QPlainTextEdit):
             
             if whole_words:
                 # 检查是否为完整单词（简化实现）
-                import re
-                word_pattern = r'\b' + re.escape(find_text) + r'\b'
                 pattern_flags = 0 if case_sensitive else re.IGNORECASE
-                matches = bool(re.fullmatch(word_pattern, selected_text, pattern_flags))
+                pattern = _compile_pattern(find_text, pattern_flags, regex=False, whole_words=True)
+                matches = bool(pattern.fullmatch(selected_text))
             
             if matches:
                 cursor.insertText(replace_text)
@@ -568,76 +693,83 @@ class TextEditor(QPlainTextEdit):
         return False
     
     def replace_all(self, find_text, replace_text, case_sensitive=False, whole_words=False, regex=False):
-        """替换所有匹配的文本"""
+        """替换所有匹配的文本
+        
+        在文档中原地替换（同一个编辑块），可一次撤销，且只重新高亮改动的行。
+        """
         if not find_text:
             return 0
         
-        count = 0
+        # 普通文本（单行）直接由 QTextDocument 查找，无需把整篇文档转换为 Python 字符串
+        if not regex and '\n' not in find_text:
+            return self._replace_all_in_document(
+                find_text, replace_text, _find_flags(case_sensitive, whole_words)
+            )
+        
+        pattern_flags = 0 if case_sensitive else re.IGNORECASE
         doc_text = self.toPlainText()
+        try:
+            pattern = _compile_pattern(find_text, pattern_flags, regex, whole_words)
+            matches = list(pattern.finditer(doc_text))
+            # 正则替换支持分组引用，先全部展开，出错时不改动文档
+            if regex:
+                replacements = [match.expand(replace_text) for match in matches]
+            else:
+                replacements = [replace_text] * len(matches)
+        except re.error as e:
+            print(f"正则表达式错误: {e}")
+            return 0
         
-        if regex:
-            # 正则表达式替换
-            import re
-            pattern_flags = 0 if case_sensitive else re.IGNORECASE
-            
-            try:
-                pattern = re.compile(find_text, pattern_flags)
-                new_text, count = pattern.subn(replace_text, doc_text)
-                
-                if count > 0:
-                    # 保存当前光标位置
-                    cursor_pos = self.textCursor().position()
-                    
-                    # 替换整个文档内容
-                    self.setPlainText(new_text)
-                    
-                    # 恢复光标位置（调整长度变化）
-                    new_cursor = self.textCursor()
-                    new_pos = min(cursor_pos, len(new_text))
-                    new_cursor.setPosition(new_pos)
-                    self.setTextCursor(new_cursor)
-                
-            except re.error as e:
-                print(f"正则表达式错误: {e}")
-                return 0
-                
-        else:
-            # 普通文本替换
-            search_text = find_text
-            if not case_sensitive:
-                doc_text_lower = doc_text.lower()
-                search_text = find_text.lower()
+        if not matches:
+            return 0
+        
+        spans = _utf16_spans(doc_text, matches)
+        
+        cursor = QTextCursor(self.document())
+        cursor.beginEditBlock()
+        # 从后往前替换，避免位置偏移
+        for (start, end), text in zip(reversed(spans), reversed(replacements)):
+            cursor.setPosition(start)
+            cursor.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
+            cursor.insertText(text)
+        cursor.endEditBlock()
+        
+        return len(matches)
+    
+    def _resolve_theme_manager(self):
+        """查找主窗口的主题管理器
+        
+        结果按所在的顶层窗口缓存，编辑器被放入其他窗口时才重新查找。
+        """
+        window = self.window()
+        if window is not self._theme_window:
+            self._theme_window = window
+            self._theme_manager = None
             
-            if whole_words:
-                # 全词匹配替换
-                import re
-                word_pattern = r'\b' + re.escape(find_text) + r'\b'
-                pattern_flags = 0 if case_sensitive else re.IGNORECASE
-                
-                new_text, count = re.subn(word_pattern, replace_text, doc_text, flags=pattern_flags)
-                
-                if count > 0:
-                    self.setPlainText(new_text)
-            else:
-                # 简单文本替换
-                if case_sensitive:
-                    new_text = doc_text.replace(find_text, replace_text)
-                    count = doc_text.count(find_text)
-                else:
-                    # 大小写不敏感替换（保持原始大小写）
-                    import re
-                    pattern = re.compile(re.escape(find_text), re.IGNORECASE)
-                    matches = list(pattern.finditer(doc_text))
-                    count = len(matches)
-                    
-                    if count > 0:
-                        # 从后往前替换，避免位置偏移
-                        new_text = doc_text
-                        for match in reversed(matches):
-                            start, end = match.span()
-                            new_text = new_text[:start] + replace_text + new_text[end:]
-                        
-                        self.setPlainText(new_text)
+            widget = self.parent()
+            search_depth = 0
+            while widget and search_depth < 10:
+                if hasattr(widget, 'theme_manager'):
+                    self._theme_manager = widget.theme_manager
+                    break
+                widget = widget.parent()
+                search_depth += 1
+        return self._theme_manager
+    
+    def _replace_all_in_document(self, find_text, replace_text, flags):
+        """用 QTextDocument.find 逐个查找并替换普通文本（同一个编辑块）"""
+        document = self.document()
+        count = 0
+        
+        edit_cursor = QTextCursor(document)
+        edit_cursor.beginEditBlock()
+        found = document.find(find_text, 0, flags)
+        while not found.isNull():
+            found.insertText(replace_text)
+            count += 1
+            # 从替换后的文本之后继续查找，不会匹配刚插入的内容
+            found = document.find(find_text, found, flags)
+        edit_cursor.endEditBlock()
         
         return count
     
@@ -645,27 +777,15 @@ class TextEditor(QPlainTextEdit):
         """应用主题样式"""
         # 获取主题管理器
         try:
-            main_window = self.parent()
-            search_depth = 0
-            while main_window and not hasattr(main_window, 'theme_manager') and search_depth < 10:
-                main_window = main_window.parent()
-                search_depth += 1
-            
-            if main_window and hasattr(main_window, 'theme_manager'):
-                theme = main_window.theme_manager.get_current_theme()
+            theme_manager = self._resolve_theme_manager()
+            if theme_manager is not None:
+                theme = theme_manager.get_current_theme()
                 colors = theme.get("colors", {})
-                current_theme_name = main_window.theme_manager.current_theme
+                current_theme_name = theme_manager.current_theme
                 
                 # 应用编辑器样式
-                style = f"""
-                QPlainTextEdit {{
-                    background-color: {colors.get('background', '#1e1e1e')};
-                    color: {colors.get('foreground', '#d4d4d4')};
-                    border: none;
-                    selection-background-color: {colors.get('selection', '#264f78')};
-                }}
-                """
-                self.setStyleSheet(style)
+                self._set_editor_style(colors)
+                self._refresh_theme_colors(colors)
                 
                 # 更新行号区域样式
                 if hasattr(self, 'line_number_area'):
@@ -674,7 +794,7 @@ class TextEditor(QPlainTextEdit):
                 print(f"编辑器应用主题成功: {current_theme_name}, 背景色: {colors.get('background', '#1e1e1e')}")
                 return True
             else:
-                print(f"未找到主题管理器，搜索深度: {search_depth}, main_window类型: {type(main_window)}")
+                print(f"未找到主题管理器，顶层窗口类型: {type(self.window())}")
         except Exception as e:
             print(f"编辑器应用主题失败: {e}")
             import traceback
@@ -682,17 +802,40 @@ class TextEditor(QPlainTextEdit):
         
         # 使用默认暗色样式
         print("应用默认暗色主题")
-        self.setStyleSheet("""
-        QPlainTextEdit {
-            background-color: #1e1e1e;
-            color: #d4d4d4;
-            border: none;
-            selection-background-color: #264f78;
-        }
-        """)
+        self._set_editor_style({})
+        self._refresh_theme_colors({})
         return False
     
+    def _refresh_theme_colors(self, colors):
+        """缓存行号区域和当前行高亮使用的主题颜色，避免每次绘制时查找主题"""
+        self._ln_bg_color = QColor(colors.get('line_number_background', '#3c3c3c'))
+        self._ln_fg_color = QColor(colors.get('line_number_foreground', '#969696'))
+        self._static_numbers.clear()
+        
+        # 当前行高亮选区，格式只在主题变化时设置
+        selection = QTextEdit.ExtraSelection()
+        selection.format.setBackground(QColor(colors.get('line_highlight', '#2a2a2a')))
+        selection.format.setProperty(QTextFormat.Property.FullWidthSelection, True)
+        self._current_line_selection = selection
+    
     def update_theme(self):
-        """更新主题（供外部调用）"""
+        """更新主题（供外部调用）
+        
+        编辑器不可见时（如后台标签页）推迟到下次显示时再应用。
+        """
+        if self.isVisible():
+            self._apply_theme()
+        else:
+            self._theme_pending = True
+    
+    def _apply_theme(self):
+        """应用主题样式并刷新当前行高亮"""
+        self._theme_pending = False
         self._apply_theme_style()
         self.highlight_current_line()
+    
+    def showEvent(self, event):
+        """显示事件：应用推迟的主题"""
+        super().showEvent(event)
+        if self._theme_pending:
+            self._apply_theme()
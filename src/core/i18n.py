@@ -3,38 +3,96 @@
 提供多语言支持功能
 """
 
+import os
+import re
+import sys
 import json
 import logging
+import functools
 from pathlib import Path
 from typing import Dict, Any, Optional
 from PyQt6.QtCore import QSettings, QLocale, QObject, pyqtSignal
 
+# 可选依赖：安装了 orjson 时用它解析语言文件，速度更快
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 
+def _flatten(tree: Dict[str, Any], prefix: str = "") -> Dict[str, str]:
+    """
+    把嵌套的翻译字典展开为扁平字典
+    
+    只保留字符串值，例如 {"menu": {"file": {"title": "文件"}}}
+    展开为 {"menu.file.title": "文件"}。键经过驻留（intern），与代码中
+    作为字面量传入 tr() 的键是同一个对象，查找时无需逐字符比较。
+    """
+    flat = {}
+    for k, v in tree.items():
+        path = prefix + k
+        if isinstance(v, dict):
+            flat.update(_flatten(v, path + "."))
+        elif isinstance(v, str):
+            flat[sys.intern(path)] = v
+    return flat
+
+
+def _load_json(path: Path) -> Any:
+    """读取并解析 JSON 文件（优先使用 orjson）"""
+    data = path.read_bytes()
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data.decode('utf-8'))
+
+
+# 语言文件开头的 {"meta": 部分（按约定 meta 是第一个顶层键）
+_META_PREFIX = re.compile(r'\s*\{\s*"meta"\s*:\s*')
+
+# 只读取 meta 时先读入的字符数
+_META_HEAD_SIZE = 4096
+
+
+def _read_meta(path: Path) -> Dict[str, Any]:
+    """
+    读取语言文件的 meta 部分
+    
+    meta 位于文件开头时只解码文件头部的 meta 对象，不解析全部翻译；
+    否则回退为完整解析。
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        head = f.read(_META_HEAD_SIZE)
+        match = _META_PREFIX.match(head)
+        if match:
+            try:
+                meta, _ = json.JSONDecoder().raw_decode(head, match.end())
+                return meta
+            except json.JSONDecodeError:
+                pass  # meta 超出已读取的部分
+    
+    return _load_json(path).get('meta', {})
+
+
+@functools.lru_cache(maxsize=256)
+def _split_key(key: str) -> tuple:
+    """拆分点号分隔的翻译键（仅在扁平字典未命中时使用）"""
+    return tuple(key.split('.'))
+
+
 class I18nManager(QObject):
     """
-    国际化管理器 - 单例模式
+    国际化管理器 - 单例（通过 get_i18n_manager() 获取）
     负责加载、管理和切换应用程序的多语言翻译
     """
     
     # 语言切换信号
     language_changed = pyqtSignal(str)  # 参数为新语言代码
     
-    _instance = None
-    _initialized = False
-    
-    def __new__(cls):
-        """单例模式实现"""
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
-    
     def __init__(self):
         """初始化国际化管理器"""
-        if self._initialized:
-            return
-            
         super().__init__()
         
         # 语言文件目录
@@ -43,21 +101,27 @@ class I18nManager(QObject):
         # 应用设置
         self.settings = QSettings('ChangoSoft', 'ChangoEditor')
         
-        # 翻译数据
+        # 翻译数据（_flat 为展开后的字符串值，供 tr() 直接查找）
         self._translations: Dict[str, Any] = {}
+        self._flat: Dict[str, str] = {}
         self._current_locale: str = "zh_CN"
         self._fallback_locale: str = "zh_CN"  # 设置简体中文为默认后备语言
         
         # 缺失翻译键记录
         self._missing_keys: set = set()
         
-        # 标记已初始化
-        self._initialized = True
-        
-        # 加载语言
-        self._load_locale()
+        # 可用语言缓存，及生成缓存时语言文件的 (文件名, 修改时间) 签名
+        self._available_cache: Optional[Dict[str, str]] = None
+        self._available_sig: Optional[tuple] = None
         
-        logger.info(f"I18n manager initialized with locale: {self._current_locale}")
+        # 语言文件在首次使用时才加载（见 _ensure_loaded），不占用导入和启动时间
+        self._loaded = False
+    
+    def _ensure_loaded(self):
+        """首次使用时加载语言文件"""
+        if not self._loaded:
+            self._load_locale()
+            logger.info(f"I18n manager initialized with locale: {self._current_locale}")
     
     def _load_locale(self):
         """加载语言文件"""
@@ -69,29 +133,59 @@ class I18nManager(QObject):
             system_locale = QLocale.system().name()  # 如 "zh_CN"
             logger.info(f"Detected system locale: {system_locale}")
             
-            # 检查系统语言文件是否存在
-            if self._locale_exists(system_locale):
-                saved_locale = system_locale
+            # 系统语言文件存在时直接加载（不存在时不会单独检查再读取）
+            if self._switch_locale(system_locale, notify=False):
+                return
+            
+            # 尝试只匹配语言代码（忽略国家/地区）
+            lang_code = system_locale.split('_')[0]  # 如 "zh"
+            
+            # 查找匹配的语言文件
+            for locale_file in self.locale_dir.glob(f"{lang_code}_*.json"):
+                saved_locale = locale_file.stem
+                logger.info(f"Found matching locale: {saved_locale}")
+                break
             else:
-                # 尝试只匹配语言代码（忽略国家/地区）
-                lang_code = system_locale.split('_')[0]  # 如 "zh"
-                
-                # 查找匹配的语言文件
-                for locale_file in self.locale_dir.glob(f"{lang_code}_*.json"):
-                    saved_locale = locale_file.stem
-                    logger.info(f"Found matching locale: {saved_locale}")
-                    break
-                else:
-                    # 使用后备语言
-                    saved_locale = self._fallback_locale
-                    logger.info(f"Using fallback locale: {saved_locale}")
+                # 使用后备语言
+                saved_locale = self._fallback_locale
+                logger.info(f"Using fallback locale: {saved_locale}")
         
-        # 3. 加载语言文件
-        self.set_locale(saved_locale)
+        # 3. 加载语言文件（首次加载不是语言切换，不发出 language_changed 信号，
+        #    否则已连接该信号的界面会在自身初始化完成前被刷新）
+        self._set_locale(saved_locale, notify=False)
     
-    def _locale_exists(self, locale: str) -> bool:
-        """检查语言文件是否存在"""
-        return (self.locale_dir / f"{locale}.json").exists()
+    def _switch_locale(self, locale: str, notify: bool = True) -> bool:
+        """
+        加载语言文件并切换到该语言
+        
+        Args:
+            locale: 语言代码
+            notify: 是否发出 language_changed 信号
+        
+        Returns:
+            语言文件不存在时返回 False（不做任何改动），否则返回 True
+        """
+        locale_file = self.locale_dir / f"{locale}.json"
+        
+        try:
+            self._set_translations(_load_json(locale_file))
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.error(f"Error loading locale {locale}: {e}")
+            self._set_translations({})
+            return True
+        
+        old_locale = self._current_locale
+        self._current_locale = locale
+        self.settings.setValue('language', locale)
+        
+        logger.info(f"Locale changed from {old_locale} to {locale}")
+        
+        # 发出语言切换信号
+        if notify:
+            self.language_changed.emit(locale)
+        return True
     
     def set_locale(self, locale: str):
         """
@@ -100,39 +194,34 @@ class I18nManager(QObject):
         Args:
             locale: 语言代码，如 "zh_CN", "en_US", "ja_JP"
         """
-        locale_file = self.locale_dir / f"{locale}.json"
-        fallback_file = self.locale_dir / f"{self._fallback_locale}.json"
+        self._set_locale(locale, notify=True)
+    
+    def _set_locale(self, locale: str, notify: bool):
+        """加载语言文件，不存在时加载后备语言"""
+        # 加载主语言文件
+        if self._switch_locale(locale, notify):
+            return
+        
+        logger.warning(f"Locale file not found: {self.locale_dir / f'{locale}.json'}")
         
+        # 加载后备语言（只有主语言文件不存在时才会读取）
+        fallback_file = self.locale_dir / f"{self._fallback_locale}.json"
         try:
-            # 加载主语言文件
-            if locale_file.exists():
-                with open(locale_file, 'r', encoding='utf-8') as f:
-                    self._translations = json.load(f)
-                
-                old_locale = self._current_locale
-                self._current_locale = locale
-                self.settings.setValue('language', locale)
-                
-                logger.info(f"Locale changed from {old_locale} to {locale}")
-                
-                # 发出语言切换信号
-                self.language_changed.emit(locale)
-            else:
-                logger.warning(f"Locale file not found: {locale_file}")
-                
-                # 加载后备语言
-                if fallback_file.exists():
-                    with open(fallback_file, 'r', encoding='utf-8') as f:
-                        self._translations = json.load(f)
-                    self._current_locale = self._fallback_locale
-                    logger.info(f"Loaded fallback locale: {self._fallback_locale}")
-                else:
-                    logger.error(f"Fallback locale file not found: {fallback_file}")
-                    self._translations = {}
-                    
+            self._set_translations(_load_json(fallback_file))
+            self._current_locale = self._fallback_locale
+            logger.info(f"Loaded fallback locale: {self._fallback_locale}")
+        except FileNotFoundError:
+            logger.error(f"Fallback locale file not found: {fallback_file}")
+            self._set_translations({})
         except Exception as e:
             logger.error(f"Error loading locale {locale}: {e}")
-            self._translations = {}
+            self._set_translations({})
+    
+    def _set_translations(self, translations: Dict[str, Any]):
+        """设置翻译数据并重建扁平查找表"""
+        self._translations = translations
+        self._flat = _flatten(translations)
+        self._loaded = True
     
     def tr(self, key: str, **kwargs) -> str:
         """
@@ -152,25 +241,34 @@ class I18nManager(QObject):
             >>> tr("message.file_saved_as", filename="test.py")
             "文件已另存为：test.py"
         """
-        keys = key.split('.')
-        value = self._translations
+        if not self._loaded:
+            self._ensure_loaded()
         
         # 递归查找键值
         try:
-            for k in keys:
-                value = value[k]
+            value = self._flat.get(key)
+            if value is None:
+                # 扁平字典只包含字符串值，其他情况（如非字符串值）逐级查找；
+                # 不含点号的键直接取顶层值，无需拆分
+                if '.' not in key:
+                    value = self._translations[key]
+                else:
+                    value = self._translations
+                    for k in _split_key(key):
+                        value = value[k]
             
-            # 支持参数格式化
-            if kwargs and isinstance(value, str):
-                return value.format(**kwargs)
+            # 支持参数格式化（不含占位符的文本无需格式化；kwargs 已是字典，
+            # 直接 format_map 避免再次解包）
+            if kwargs and isinstance(value, str) and '{' in value:
+                return value.format_map(kwargs)
             
             return str(value)
             
         except (KeyError, TypeError) as e:
-            # 记录缺失的翻译键
-            if key not in self._missing_keys:
-                self._missing_keys.add(key)
-                logger.debug(f"Missing translation key: {key}")
+            # 记录缺失的翻译键（同一个键只输出一次调试日志，未开启 DEBUG 时不做检查）
+            if logger.isEnabledFor(logging.DEBUG) and key not in self._missing_keys:
+                logger.debug("Missing translation key: %s", key)
+            self._missing_keys.add(key)
             
             # 返回键名作为后备
             return key
@@ -189,16 +287,28 @@ class I18nManager(QObject):
         locales = {}
         
         try:
-            for file in self.locale_dir.glob("*.json"):
+            # 语言文件没有增删改时直接返回缓存，不再逐个解析
+            signature = tuple(sorted(
+                (entry.name, entry.stat().st_mtime_ns)
+                for entry in os.scandir(self.locale_dir)
+                if entry.name.endswith('.json')
+            ))
+            if signature == self._available_sig:
+                return dict(self._available_cache)
+            
+            for name, _ in signature:
+                file = self.locale_dir / name
                 locale_code = file.stem
                 
                 try:
-                    with open(file, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        language_name = data.get('meta', {}).get('language', locale_code)
-                        locales[locale_code] = language_name
+                    language_name = _read_meta(file).get('language', locale_code)
+                    locales[locale_code] = language_name
                 except Exception as e:
                     logger.error(f"Error reading locale file {file}: {e}")
+            
+            self._available_cache = locales
+            self._available_sig = signature
+            return dict(locales)
                     
         except Exception as e:
             logger.error(f"Error scanning locale directory: {e}")
@@ -212,6 +322,7 @@ class I18nManager(QObject):
         Returns:
             当前语言代码，如 "zh_CN"
         """
+        self._ensure_loaded()
         return self._current_locale
     
     def get_current_locale_name(self) -> str:
@@ -221,6 +332,7 @@ class I18nManager(QObject):
         Returns:
             当前语言名称，如 "简体中文"
         """
+        self._ensure_loaded()
         return self._translations.get('meta', {}).get('language', self._current_locale)
     
     def export_missing_keys(self, output_file: str = "missing_translations.txt"):
@@ -263,7 +375,7 @@ _i18n: Optional[I18nManager] = None
 
 def get_i18n_manager() -> I18nManager:
     """
-    获取国际化管理器单例
+    获取国际化管理器单例（首次调用时创建）
     
     Returns:
         I18nManager实例
@@ -333,12 +445,5 @@ def get_current_language_name() -> str:
     return get_i18n_manager().get_current_locale_name()
 
 
-# ============================================================================
-# 初始化
-# ============================================================================
-
-# 自动初始化（导入时创建单例）
-_i18n = I18nManager()
-
 logger.info("I18n module loaded successfully")
 
@@ -10,14 +10,14 @@ Chango Editor - 主入口文件
 
 import sys
 import os
-import io
 
-# 设置控制台输出编码为UTF-8，避免中文乱码
+# 设置控制台输出编码为UTF-8，避免中文乱码（原地切换编码，不替换流对象）
 if sys.platform == 'win32':
     try:
-        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
-    except (AttributeError, io.UnsupportedOperation):
+        sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+        sys.stderr.reconfigure(encoding='utf-8', errors='replace')
+    except AttributeError:
+        # 无控制台窗口的打包程序中 stdout/stderr 为 None
         pass
 
 from PyQt6.QtWidgets import QApplication
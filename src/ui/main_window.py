@@ -236,6 +236,13 @@ class MainWindow(QMainWindow):
         toggle_explorer_action.triggered.connect(self._toggle_file_explorer)
         view_menu.addAction(toggle_explorer_action)
         
+        # 为大文件手动启用语法高亮（仅当前文件处于大文件模式时可用）
+        self.enable_highlighting_action = QAction(tr("menu.view.enable_highlighting.text"), self)
+        self.enable_highlighting_action.setStatusTip(tr("menu.view.enable_highlighting.tip"))
+        self.enable_highlighting_action.triggered.connect(self._enable_highlighting)
+        view_menu.addAction(self.enable_highlighting_action)
+        self._update_highlighting_action()
+        
         # 独立的主题菜单
         theme_menu = menubar.addMenu(tr("menu.theme.title"))
         
@@ -656,6 +663,18 @@ class MainWindow(QMainWindow):
         """切换文件浏览器显示状态"""
         self.file_explorer.setVisible(checked)
     
+    def _enable_highlighting(self):
+        """为当前大文件启用语法高亮"""
+        editor = self.tab_widget.get_current_editor()
+        if editor and editor.large_file_mode:
+            editor.force_enable_highlighting()
+            self.statusbar.showMessage("已启用语法高亮", 2000)
+    
+    def _update_highlighting_action(self, *_):
+        """根据当前编辑器是否处于大文件模式更新“启用语法高亮”菜单项"""
+        editor = self.tab_widget.get_current_editor()
+        self.enable_highlighting_action.setEnabled(bool(editor and editor.large_file_mode))
+    
     def _on_editor_changed(self, editor):
         """编辑器切换时的处理"""
         if editor:
@@ -667,15 +686,18 @@ class MainWindow(QMainWindow):
             editor.selectionChanged.connect(self._update_edit_actions)
             editor.undoAvailable.connect(self._update_undo_action)
             editor.redoAvailable.connect(self._update_redo_action)
+            editor.large_file_mode_changed.connect(self._update_highlighting_action)
             
             # 初始更新菜单状态
             self._update_edit_actions()
+            self._update_highlighting_action()
             self._update_undo_action(editor.document().isUndoAvailable())
             self._update_redo_action(editor.document().isRedoAvailable())
         else:
             self.statusbar.showMessage("就绪")
             # 禁用所有编辑动作
             self._disable_edit_actions()
+            self._update_highlighting_action()
     
     # 文件操作方法
     def new_file(self):
@@ -761,7 +783,11 @@ class MainWindow(QMainWindow):
     def open_file_from_path(self, file_path):
         """从路径打开文件"""
         if self.tab_widget.open_file(file_path):
-            self.statusbar.showMessage(f"已打开: {file_path}", 3000)
+            editor = self.tab_widget.get_current_editor()
+            if editor and editor.large_file_mode:
+                self.statusbar.showMessage(f"已打开: {file_path}（大文件，已关闭语法高亮）", 5000)
+            else:
+                self.statusbar.showMessage(f"已打开: {file_path}", 3000)
             self.file_opened.emit(file_path)
         else:
             QMessageBox.warning(self, "错误", f"无法打开文件: {file_path}")
@@ -18,6 +18,7 @@ from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QUrl
 from PyQt6.QtGui import QFont
 
 from core.editor import TextEditor
+from utils.charset_sniff import read_text_file
 
 
 class TabWidget(QTabWidget):
@@ -67,7 +68,7 @@ class TabWidget(QTabWidget):
         
         # 设置内容
         if content:
-            editor.setPlainText(content)
+            editor.set_content(content)
         
         # 确定标签名称
         if file_path:
@@ -134,35 +135,20 @@ class TabWidget(QTabWidget):
                 return True
         
         try:
-            # 读取文件内容
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            # 读取文件内容（自动识别编码）
+            content, encoding = read_text_file(file_path)
             
             # 创建新标签页
             index = self.new_tab(file_path, content)
             
-            # 标记为已保存状态
+            # 标记为已保存状态，保存时沿用原编码
             editor = self.editors[index]
+            editor.file_encoding = encoding
             editor.document().setModified(False)
             
-            print(f"成功打开文件: {file_path}")
+            print(f"成功打开文件: {file_path} (编码: {encoding})")
             return True
             
-        except UnicodeDecodeError:
-            try:
-                # 尝试其他编码
-                with open(file_path, 'r', encoding='gbk') as f:
-                    content = f.read()
-                
-                index = self.new_tab(file_path, content)
-                editor = self.editors[index]
-                editor.document().setModified(False)
-                
-                print(f"使用GBK编码打开文件: {file_path}")
-                return True
-            except Exception as e:
-                print(f"打开文件失败: {file_path}, 错误: {e}")
-                return False
         except Exception as e:
             print(f"打开文件失败: {file_path}, 错误: {e}")
             return False
@@ -0,0 +1,84 @@
+"""
+文件编码识别 - Chango Editor
+
+通过BOM和UTF-8校验识别文本文件编码，无需 chardet 的语言模型
+"""
+
+import codecs
+import locale
+
+# BOM 与对应编码（UTF-32 的BOM以 UTF-16 的BOM开头，需优先匹配）
+BOM_ENCODINGS = [
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+# 非UTF-8文件的兜底编码（中文Windows的本地编码即GBK）
+FALLBACK_ENCODING = 'gbk'
+
+# 预判是否为UTF-8时检查的文件开头字节数
+SAMPLE_SIZE = 64 * 1024
+
+
+def _fallback_encodings():
+    """按优先级返回非UTF-8文件可尝试的编码"""
+    encodings = [locale.getpreferredencoding(False), FALLBACK_ENCODING]
+    return list(dict.fromkeys(codecs.lookup(e).name for e in encodings))
+
+
+def _sample_is_utf8(sample):
+    """文件开头的样本能否按UTF-8解码（样本末尾被截断的多字节字符不算错误）"""
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def decode_bytes(data):
+    """识别编码并解码文件内容
+
+    Args:
+        data: 文件的原始字节
+
+    Returns:
+        tuple: (文本内容, 编码名称)，编码名称可直接用于保存文件
+
+    Raises:
+        UnicodeDecodeError: 所有候选编码都无法解码时抛出
+    """
+    for bom, encoding in BOM_ENCODINGS:
+        if data.startswith(bom):
+            return data.decode(encoding), encoding
+
+    # 开头就不是UTF-8的文件不必对整个文件尝试UTF-8解码
+    error = None
+    if _sample_is_utf8(data[:SAMPLE_SIZE]):
+        try:
+            return data.decode('utf-8'), 'utf-8'
+        except UnicodeDecodeError as e:
+            error = e
+
+    for encoding in _fallback_encodings():
+        try:
+            return data.decode(encoding), encoding
+        except UnicodeDecodeError as e:
+            error = e
+    raise error
+
+
+def read_text_file(file_path):
+    """读取文本文件并自动识别编码
+
+    换行符与文本模式 open() 一致，统一转换为 '\\n'。
+
+    Returns:
+        tuple: (文本内容, 编码名称)
+    """
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    content, encoding = decode_bytes(data)
+    return content.replace('\r\n', '\n').replace('\r', '\n'), encoding
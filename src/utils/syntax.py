@@ -14,7 +14,7 @@ from PyQt6.QtCore import Qt
 
 try:
     from pygments import highlight
-    from pygments.lexers import get_lexer_by_name, guess_lexer
+    from pygments.lexers import get_lexer_by_name
     from pygments.formatters import NullFormatter
     from pygments.token import Token
     PYGMENTS_AVAILABLE = True
@@ -8,6 +8,7 @@
 - 主题配置管理
 """
 
+import gzip
 import json
 import os
 import sys
@@ -68,19 +69,27 @@ class ThemeManager(QObject):
             return
         
         for filename in os.listdir(self.theme_dir):
-            if filename.endswith('.json'):
+            # 打包后的主题文件经过 gzip 压缩（.json.gz）
+            if filename.endswith('.json.gz'):
+                theme_name = filename[:-len('.json.gz')]
+                opener = gzip.open
+            elif filename.endswith('.json'):
                 theme_name = os.path.splitext(filename)[0]
-                theme_path = os.path.join(self.theme_dir, filename)
-                try:
-                    with open(theme_path, 'r', encoding='utf-8') as f:
-                        theme_data = json.load(f)
-                        # 更新主题描述中的应用名称
-                        if 'description' in theme_data:
-                            theme_data['description'] = theme_data['description'].replace('PyEditor Lite', 'Chango Editor')
-                        self.themes[theme_name] = theme_data
-                        print(f"加载主题: {theme_name}")
-                except Exception as e:
-                    print(f"加载主题失败 {filename}: {e}")
+                opener = open
+            else:
+                continue
+            
+            theme_path = os.path.join(self.theme_dir, filename)
+            try:
+                with opener(theme_path, 'rt', encoding='utf-8') as f:
+                    theme_data = json.load(f)
+                    # 更新主题描述中的应用名称
+                    if 'description' in theme_data:
+                        theme_data['description'] = theme_data['description'].replace('PyEditor Lite', 'Chango Editor')
+                    self.themes[theme_name] = theme_data
+                    print(f"加载主题: {theme_name}")
+            except Exception as e:
+                print(f"加载主题失败 {filename}: {e}")
     
     def _create_default_themes(self):
         """创建默认主题"""
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+build_exe.py 打包辅助函数测试
+"""
+
+import io
+import struct
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加项目根目录到Python路径
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import build_exe
+
+
+@pytest.fixture
+def in_root(monkeypatch):
+    """语言映射按相对路径读取，测试在项目根目录下运行"""
+    monkeypatch.chdir(ROOT)
+
+
+def test_mapped_lexer_aliases_resolve_to_kept_modules(in_root):
+    """编辑器映射中的每个语言别名都落在打包保留的词法分析器模块中"""
+    pytest.importorskip('pygments')
+    from pygments.lexers import get_lexer_by_name
+    from pygments.lexers._mapping import LEXERS
+
+    result = build_exe.collect_used_lexer_modules()
+    assert result is not None
+    used, all_modules = result
+    assert used < all_modules
+
+    alias_to_module = {
+        alias: module
+        for module, _, aliases, _, _ in LEXERS.values()
+        for alias in aliases
+    }
+    aliases = build_exe.mapped_lexer_aliases()
+    assert aliases
+    for alias in sorted(aliases):
+        assert alias in alias_to_module, alias
+        assert alias_to_module[alias] in used, alias
+        assert type(get_lexer_by_name(alias)).__module__ in used, alias
+
+
+def _png(size):
+    Image = pytest.importorskip('PIL.Image')
+    buffer = io.BytesIO()
+    Image.new('RGBA', (size, size), (0, 128, 255, 255)).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def test_write_ico_layout(tmp_path):
+    """ICO 头、目录项和依次存放的PNG数据"""
+    images = [(16, b'png-16'), (48, b'png-48-data'), (256, b'png-256')]
+    ico_path = tmp_path / 'icon.ico'
+    build_exe._write_ico(ico_path, images)
+    data = ico_path.read_bytes()
+
+    assert struct.unpack_from('<HHH', data, 0) == (0, 1, len(images))
+    offset = 6 + 16 * len(images)
+    for index, (size, png_data) in enumerate(images):
+        width, height, colors, reserved, planes, bpp, length, start = struct.unpack_from(
+            '<BBBBHHII', data, 6 + 16 * index
+        )
+        assert width == height == (0 if size == 256 else size)
+        assert (colors, reserved, planes, bpp) == (0, 0, 1, 32)
+        assert (length, start) == (len(png_data), offset)
+        assert data[start:start + length] == png_data
+        offset += length
+    assert len(data) == offset
+
+
+def test_write_ico_readable_by_pillow(tmp_path):
+    sizes = [16, 32, 256]
+    ico_path = tmp_path / 'icon.ico'
+    build_exe._write_ico(ico_path, [(size, _png(size)) for size in sizes])
+
+    from PIL import Image
+    with Image.open(ico_path) as ico:
+        assert ico.format == 'ICO'
+        assert sorted(ico.info['sizes']) == [(size, size) for size in sizes]
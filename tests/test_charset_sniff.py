@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+文件编码识别测试
+"""
+
+import codecs
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加src目录到Python路径
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'src'))
+
+from utils import charset_sniff
+from utils.charset_sniff import decode_bytes, read_text_file
+
+TEXT = "你好, Chango Editor 😀\n"
+
+
+@pytest.fixture(autouse=True)
+def utf8_locale(monkeypatch):
+    """固定本地编码，使兜底顺序为 UTF-8 之后的 GBK"""
+    monkeypatch.setattr(charset_sniff.locale, 'getpreferredencoding', lambda do_setlocale=True: 'UTF-8')
+
+
+@pytest.mark.parametrize('bom, codec, expected', [
+    (codecs.BOM_UTF8, 'utf-8', 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le', 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be', 'utf-16'),
+    (codecs.BOM_UTF32_LE, 'utf-32-le', 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be', 'utf-32'),
+])
+def test_bom(bom, codec, expected):
+    """按BOM识别编码，解码后的文本不含BOM"""
+    content, encoding = decode_bytes(bom + TEXT.encode(codec))
+    assert content == TEXT
+    assert encoding == expected
+
+
+def test_utf8_without_bom():
+    assert decode_bytes(TEXT.encode('utf-8')) == (TEXT, 'utf-8')
+
+
+def test_gbk():
+    """不是UTF-8的中文文件按GBK解码"""
+    text = "中文编码测试：简体字\n"
+    assert decode_bytes(text.encode('gbk')) == (text, 'gbk')
+
+
+def test_invalid_bytes():
+    """所有候选编码都无法解码时抛出 UnicodeDecodeError"""
+    with pytest.raises(UnicodeDecodeError):
+        decode_bytes(b'abc\xff\xff')
+
+
+def test_read_text_file_normalizes_newlines(tmp_path):
+    """换行符与文本模式 open() 一致，统一为 '\\n'"""
+    path = tmp_path / 'crlf.txt'
+    path.write_bytes(codecs.BOM_UTF8 + "第一行\r\n第二行\r第三行\n".encode('utf-8'))
+    assert read_text_file(path) == ("第一行\n第二行\n第三行\n", 'utf-8-sig')
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+编辑器辅助函数测试
+"""
+
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加src目录到Python路径
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'src'))
+
+pytest.importorskip('PyQt6.QtWidgets')
+
+from core.editor import _utf16_spans
+
+
+def spans(text, pattern):
+    return _utf16_spans(text, re.finditer(pattern, text))
+
+
+def test_bmp_text_uses_character_offsets():
+    assert spans("def 函数(): pass", r"\w+") == [(0, 3), (4, 6), (10, 14)]
+
+
+def test_astral_characters_count_as_two_units():
+    """BMP 以外的字符在 QTextDocument 中占两个 UTF-16 编码单元"""
+    text = "😀 foo 😀😀 bar"
+    assert spans(text, r"[a-z]+") == [(3, 6), (12, 15)]
+
+
+def test_match_containing_astral_characters():
+    text = "a'😀𝒳'b"
+    assert spans(text, r"'[^']*'") == [(1, 7)]
+    assert spans(text, r"b") == [(7, 8)]
+
+
+def test_no_matches():
+    assert spans("😀", r"x") == []
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+国际化模块辅助函数测试
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加项目根目录到Python路径
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+pytest.importorskip('PyQt6.QtCore')
+
+from src.core import i18n
+
+
+def test_flatten_nested_keys():
+    """嵌套字典展开为点号分隔的键，只保留字符串值"""
+    tree = {
+        "meta": {"name": "English", "version": 1},
+        "menu": {
+            "file": {"title": "File", "new": {"text": "New", "tip": "Create"}},
+            "edit": "Edit",
+        },
+        "list": ["ignored"],
+    }
+    assert i18n._flatten(tree) == {
+        "meta.name": "English",
+        "menu.file.title": "File",
+        "menu.file.new.text": "New",
+        "menu.file.new.tip": "Create",
+        "menu.edit": "Edit",
+    }
+
+
+def test_flatten_prefix():
+    assert i18n._flatten({"a": {"b": "x"}}, "root.") == {"root.a.b": "x"}
+
+
+def test_read_meta_from_truncated_file(tmp_path):
+    """meta 位于开头时只解析文件头，文件其余部分截断也能读出"""
+    meta = {"name": "简体中文", "locale": "zh_CN"}
+    text = json.dumps({"meta": meta, "menu": {"file": "文件"}}, ensure_ascii=False)
+    path = tmp_path / 'zh_CN.json'
+    path.write_text(text[:text.index('"menu"') + 10], encoding='utf-8')
+    assert i18n._read_meta(path) == meta
+
+
+def test_read_meta_falls_back_to_full_parse(tmp_path):
+    """meta 不在开头或超出文件头时完整解析"""
+    meta = {"name": "English", "notes": "x" * (i18n._META_HEAD_SIZE * 2)}
+    path = tmp_path / 'en_US.json'
+    path.write_text(json.dumps({"meta": meta}), encoding='utf-8')
+    assert i18n._read_meta(path) == meta
+
+    path.write_text(json.dumps({"menu": {}, "meta": {"name": "English"}}), encoding='utf-8')
+    assert i18n._read_meta(path) == {"name": "English"}
+
+
+def test_read_meta_truncated_inside_meta(tmp_path):
+    """meta 本身被截断时无法解析，抛出 JSON 解析错误"""
+    path = tmp_path / 'broken.json'
+    path.write_text('{"meta": {"name": "Eng', encoding='utf-8')
+    with pytest.raises(ValueError):
+        i18n._read_meta(path)